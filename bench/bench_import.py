@@ -0,0 +1,47 @@
+"""
+Measures import time of monquery entry points with `python -X importtime`,
+net of the interpreter startup imports.
+
+Run from the repository root:
+    PYTHONPATH=. python bench/bench_import.py
+"""
+import subprocess
+import sys
+
+
+STATEMENTS = [
+    "import monquery",
+    "import monquery.db",
+    "from monquery import FilterSimple, ParamEq, parse_int",
+    "from monquery import pymongo_find, Sorting, PaginationBasic",
+    "import monquery.fltr, monquery.paginate, monquery.parse, monquery.sort",
+]
+RUNS = 5
+
+
+def import_time_us(statement: str) -> int:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    total = 0
+    for line in stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        _, _, fields = line.partition("import time:")
+        parts = fields.split("|")
+        if len(parts) == 3 and parts[0].strip().isdigit():
+            total += int(parts[0])
+    return total
+
+
+def main():
+    baseline = min(import_time_us("pass") for _ in range(RUNS))
+    for statement in STATEMENTS:
+        best = min(import_time_us(statement) for _ in range(RUNS)) - baseline
+        print(f"{statement:<72} {best / 1000:>7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
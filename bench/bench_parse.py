@@ -0,0 +1,45 @@
+"""
+Compares the datetime converters of `monquery.parse`.
+
+Run from the repository root:
+    PYTHONPATH=. python bench/bench_parse.py
+"""
+import timeit
+
+from monquery.parse import (
+    memoized,
+    parse_datetime_iso,
+    parse_datetime_rfc3339,
+    parse_datetime_utc_timestamp,
+    parse_epoch_millis,
+)
+
+
+NUMBER = 200_000
+
+CASES = [
+    ("parse_datetime_iso", parse_datetime_iso, "2022-05-06T20:35:14.991282"),
+    ("parse_datetime_iso (error)", parse_datetime_iso, "incorrect-format"),
+    ("parse_datetime_rfc3339", parse_datetime_rfc3339, "2022-05-06T20:35:14.991Z"),
+    ("parse_datetime_rfc3339 (error)", parse_datetime_rfc3339, "incorrect-format"),
+    (
+        "memoized(parse_datetime_rfc3339)",
+        memoized(parse_datetime_rfc3339),
+        "2022-05-06T20:35:14.991Z",
+    ),
+    ("parse_datetime_utc_timestamp", parse_datetime_utc_timestamp, "1651869314.991"),
+    ("parse_datetime_utc_timestamp (error)", parse_datetime_utc_timestamp, "foo"),
+    ("parse_epoch_millis", parse_epoch_millis, "1651869314991"),
+    ("parse_epoch_millis (error)", parse_epoch_millis, "foo"),
+    ("memoized(parse_epoch_millis)", memoized(parse_epoch_millis), "1651869314991"),
+]
+
+
+def main():
+    for title, conv, value in CASES:
+        seconds = timeit.timeit(lambda: conv(value), number=NUMBER)
+        print(f"{title:<40} {seconds / NUMBER * 1e9:>8.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
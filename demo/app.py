@@ -4,7 +4,7 @@ from urllib.parse import parse_qs
 import pymongo
 from motor.motor_asyncio import AsyncIOMotorClient
 from starlette.applications import Starlette
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
 from starlette.requests import Request
 import uvicorn
 
@@ -20,6 +20,7 @@ from monquery import (
     ParamMin,
     parse_datetime_iso,
 )
+from monquery.raw import raw_list_to_json
 
 app = Starlette(debug=True)
 
@@ -49,6 +50,9 @@ client = AsyncIOMotorClient()
 todos_collection = client["monquery-sample-app"]["todos"]
 
 
+ITEM_FIELDS = ["title", "description", "created_at"]
+
+
 def item_to_json(item):
     return {
         "title": item["title"],
@@ -65,10 +69,15 @@ async def todos(request: Request):
         sorting,
         pg,
         parse_qs(request.url.query),
+        projection={"_id": False, **{f: True for f in ITEM_FIELDS}},
+        raw=True,
     )
     if err:
-        return JSONResponse({"error": err}, status_code=400)
-    return JSONResponse([item_to_json(item) async for item in cursor])
+        return JSONResponse({"error": err.as_dict()}, status_code=400)
+    return Response(
+        raw_list_to_json([item async for item in cursor], ITEM_FIELDS),
+        media_type="application/json",
+    )
 
 
 @app.route("/todos/", methods=["POST"])
@@ -1,5 +1,101 @@
-from monquery.fltr import *
-from monquery.paginate import *
-from monquery.parse import *
-from monquery.sort import *
-from monquery.db import pymongo_find
+"""
+Public names are loaded lazily (PEP 562), so `import monquery`
+only imports the submodules whose names are actually used.
+"""
+_EXPORTS = {
+    "Conv": "monquery.fltr",
+    "Param": "monquery.fltr",
+    "ParamMultiValue": "monquery.fltr",
+    "ParamSingleValue": "monquery.fltr",
+    "ParamEq": "monquery.fltr",
+    "ParamNe": "monquery.fltr",
+    "ParamMax": "monquery.fltr",
+    "ParamMin": "monquery.fltr",
+    "ParamArray": "monquery.fltr",
+    "ParamOf": "monquery.fltr",
+    "ParamPrefix": "monquery.fltr",
+    "ParamPrefixCi": "monquery.fltr",
+    "ParamText": "monquery.fltr",
+    "CASE_INSENSITIVE_COLLATION": "monquery.fltr",
+    "Filter": "monquery.fltr",
+    "FilterSimple": "monquery.fltr",
+    "Naming": "monquery.fltr",
+    "NamingBasic": "monquery.fltr",
+    "dollar_naming": "monquery.fltr",
+    "params_basic": "monquery.fltr",
+    "Pg": "monquery.paginate",
+    "Pagination": "monquery.paginate",
+    "PaginationBasic": "monquery.paginate",
+    "PaginationDummy": "monquery.paginate",
+    "parse_datetime_iso": "monquery.parse",
+    "parse_datetime_rfc3339": "monquery.parse",
+    "parse_datetime_utc_timestamp": "monquery.parse",
+    "parse_epoch_millis": "monquery.parse",
+    "parse_int": "monquery.parse",
+    "parse_float": "monquery.parse",
+    "parse_string": "monquery.parse",
+    "parse_bool": "monquery.parse",
+    "optional": "monquery.parse",
+    "memoized": "monquery.parse",
+    "Sorting": "monquery.sort",
+    "SortingOption": "monquery.sort",
+    "TEXT_SCORE": "monquery.sort",
+    "text_score_option": "monquery.sort",
+    "pymongo_find": "monquery.db",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(__import__(module, fromlist=(name,)), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
+
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:  # pragma: no cover
+    from monquery.fltr import (
+        Conv,
+        Param,
+        ParamMultiValue,
+        ParamSingleValue,
+        ParamEq,
+        ParamNe,
+        ParamMax,
+        ParamMin,
+        ParamArray,
+        ParamOf,
+        ParamPrefix,
+        ParamPrefixCi,
+        ParamText,
+        CASE_INSENSITIVE_COLLATION,
+        Filter,
+        FilterSimple,
+        Naming,
+        NamingBasic,
+        dollar_naming,
+        params_basic,
+    )
+    from monquery.paginate import Pg, Pagination, PaginationBasic, PaginationDummy
+    from monquery.parse import (
+        parse_datetime_iso,
+        parse_datetime_rfc3339,
+        parse_datetime_utc_timestamp,
+        parse_epoch_millis,
+        parse_int,
+        parse_float,
+        parse_string,
+        parse_bool,
+        optional,
+        memoized,
+    )
+    from monquery.sort import Sorting, SortingOption, TEXT_SCORE, text_score_option
+    from monquery.db import pymongo_find
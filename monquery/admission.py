@@ -0,0 +1,459 @@
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    NoReturn,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from monquery.db import pymongo_cursor, pymongo_query
+from monquery.errors import Err
+from monquery.fltr import Filter
+from monquery.paginate import Pagination
+from monquery.query import Query, freeze
+from monquery.sort import Sorting, SortingOption
+
+
+class Shape(NamedTuple):
+    """
+    A query stripped of its values: which fields are filtered with which operators,
+    how the results are sorted and how many of them are requested
+    (rounded up to a power of two, so that varying the limit doesn't
+    produce new shapes)
+    """
+
+    filter: Tuple[Tuple[str, str], ...]
+    sort: Optional[Tuple[str, Any]]
+    limit: Optional[int]
+
+
+def shape_of(q: Query) -> Shape:
+    """
+    :param q: translated query
+    :return: the shape of the query
+    """
+    pairs: Set[Tuple[str, str]] = set()
+    _collect(q.filter, pairs)
+    return Shape(
+        tuple(sorted(pairs)),
+        None if q.sort is None else _sort_key(q.sort),
+        _limit_bucket(q.pg.limit),
+    )
+
+
+def _limit_bucket(limit: Optional[int]) -> Optional[int]:
+    if not limit:
+        return None
+    return 1 << (limit - 1).bit_length()
+
+
+def _collect(fltr: Dict[str, Any], pairs: Set[Tuple[str, str]]) -> None:
+    for key, value in fltr.items():
+        if key in ("$and", "$or", "$nor"):
+            for sub in value:
+                _collect(sub, pairs)
+        elif key.startswith("$"):
+            pairs.add((key, key))
+        elif isinstance(value, dict) and value and next(iter(value)).startswith("$"):
+            pairs.update((key, op) for op in value)
+        else:
+            pairs.add((key, "$eq"))
+
+
+def _sort_key(option: SortingOption) -> Tuple[str, Any]:
+    direction = option.direction
+    return (
+        option.field or option.name,
+        freeze(direction) if isinstance(direction, dict) else direction,
+    )
+
+
+class Rejected(Exception):
+    """
+    Raised when a query is not admitted within the allowed wait time
+    """
+
+    def __init__(self, shape: Shape):
+        super().__init__(f"Query not admitted: {shape!r}")
+        self.shape: Shape = shape
+
+
+class ShapeLimit:
+    """
+    Concurrency and rate limits applied separately to every query shape
+    matching the rule. A rule matches shapes filtering by any of its fields
+    or operators, sorted by any of its sorting options, or without a limit
+    if `unbounded` is set. A rule without any criteria matches every shape.
+    """
+
+    __slots__ = (
+        "_fields",
+        "_operators",
+        "_sorts",
+        "_unbounded",
+        "max_concurrency",
+        "rate",
+        "burst",
+    )
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        fields: Iterable[str] = (),
+        operators: Iterable[str] = (),
+        sorting: Iterable[SortingOption] = (),
+        unbounded: bool = False,
+    ):
+        """
+        :param max_concurrency: max number of concurrently running queries of a shape
+        :param rate: max number of queries of a shape per second
+        :param burst: number of queries of a shape allowed at once above the rate
+        :param fields: filtered fields the rule applies to
+        :param operators: filter operators the rule applies to, e.g. `$nin`
+        :param sorting: sorting options the rule applies to
+        :param unbounded: apply the rule to queries without a limit
+        """
+        if rate is not None and rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate!r}")
+        self._fields: Set[str] = set(fields)
+        self._operators: Set[str] = set(operators)
+        self._sorts: Set[Tuple[str, Any]] = {_sort_key(s) for s in sorting}
+        self._unbounded: bool = unbounded
+        self.max_concurrency: Optional[int] = max_concurrency
+        self.rate: Optional[float] = rate
+        self.burst: int = burst
+
+    def matches(self, shape: Shape) -> bool:
+        if not (self._fields or self._operators or self._sorts or self._unbounded):
+            return True
+        return (
+            any(f in self._fields or op in self._operators for f, op in shape.filter)
+            or (shape.sort is not None and shape.sort in self._sorts)
+            or (self._unbounded and shape.limit is None)
+        )
+
+
+class TokenBucket:
+    __slots__ = ("_rate", "_burst", "_tokens", "_updated", "_clock", "_lock")
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._rate: float = rate
+        self._burst: int = burst
+        self._tokens: float = float(burst)
+        self._clock: Callable[[], float] = clock
+        self._updated: float = clock()
+        self._lock: threading.Lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """
+        Takes a token, possibly ahead of time.
+
+        :param max_wait: max seconds the caller is willing to wait
+        :return: seconds to wait before proceeding or `None` if a token
+            is not going to be available in time
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                float(self._burst), self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self._rate)
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def refund(self) -> None:
+        """
+        Gives back a token taken by `reserve` which wasn't used
+        """
+        with self._lock:
+            self._tokens = min(float(self._burst), self._tokens + 1)
+
+
+class _Gate:
+    __slots__ = ("semaphore", "bucket", "users")
+
+    def __init__(self, semaphore: Any, bucket: Optional[TokenBucket]):
+        self.semaphore: Any = semaphore
+        self.bucket: Optional[TokenBucket] = bucket
+        # queries between admission and completion, a gate in use is never evicted
+        self.users: int = 0
+
+
+class AdmissionStats:
+    __slots__ = ("admitted", "rejected", "waited", "_lock")
+
+    def __init__(self) -> None:
+        self.admitted: int = 0
+        self.rejected: int = 0
+        self.waited: float = 0.0
+        self._lock: threading.Lock = threading.Lock()
+
+    def record(self, admitted: bool, waited: float) -> None:
+        with self._lock:
+            if admitted:
+                self.admitted += 1
+            else:
+                self.rejected += 1
+            self.waited += waited
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "waited": self.waited,
+        }
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.as_dict()!r})"
+
+
+class _Admission(ABC):
+    def __init__(
+        self, limits: List[ShapeLimit], max_wait: float = 0.0, max_shapes: int = 1024
+    ):
+        """
+        :param limits: rules, every matching rule applies
+        :param max_wait: max seconds a query may wait for admission
+        :param max_shapes: max number of shapes to keep the limits state for,
+            the least recently seen shapes without running queries
+            start over when exceeded
+        """
+        self._limits: List[ShapeLimit] = limits
+        self._max_wait: float = max_wait
+        self._max_shapes: int = max_shapes
+        self._gates: "OrderedDict[Tuple[int, Shape], _Gate]" = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+        self.stats: AdmissionStats = AdmissionStats()
+
+    @abstractmethod
+    def _semaphore(self, value: int) -> Any:
+        pass
+
+    def _gates_for(self, shape: Shape) -> List[_Gate]:
+        """
+        :return: gates of the shape, marked as in use until `_release`d
+        """
+        gates = []
+        with self._lock:
+            for i, limit in enumerate(self._limits):
+                if not limit.matches(shape):
+                    continue
+                key = (i, shape)
+                gate = self._gates.get(key)
+                if gate is None:
+                    gate = self._gates[key] = _Gate(
+                        None
+                        if limit.max_concurrency is None
+                        else self._semaphore(limit.max_concurrency),
+                        None
+                        if limit.rate is None
+                        else TokenBucket(limit.rate, limit.burst),
+                    )
+                else:
+                    self._gates.move_to_end(key)
+                gate.users += 1
+                gates.append(gate)
+            self._evict()
+        return gates
+
+    def _evict(self) -> None:
+        excess = len(self._gates) - self._max_shapes
+        if excess <= 0:
+            return
+        idle = [key for key, gate in self._gates.items() if not gate.users]
+        for key in idle[:excess]:
+            del self._gates[key]
+
+    def _release(self, gates: List[_Gate]) -> None:
+        with self._lock:
+            for gate in gates:
+                gate.users -= 1
+
+    def _reserve(
+        self, shape: Shape, gates: List[_Gate], started: float
+    ) -> Tuple[float, List[TokenBucket]]:
+        """
+        Takes a token from every rate limited gate before any semaphore is held,
+        so that waiting for the rate doesn't occupy concurrency slots.
+        """
+        wait = 0.0
+        taken: List[TokenBucket] = []
+        for gate in gates:
+            if gate.bucket is not None:
+                w = gate.bucket.reserve(self._max_wait)
+                if w is None:
+                    self._reject(shape, taken, started)
+                taken.append(gate.bucket)
+                wait = max(wait, w)
+        return wait, taken
+
+    def _reject(
+        self, shape: Shape, taken: List[TokenBucket], started: float
+    ) -> NoReturn:
+        for bucket in taken:
+            bucket.refund()
+        self.stats.record(False, time.monotonic() - started)
+        raise Rejected(shape)
+
+
+class AdmissionController(_Admission):
+    """
+    Runs queries through per-shape concurrency and rate limits (threaded).
+    Excess queries wait up to `max_wait` seconds and are rejected
+    with `Rejected` after that.
+    """
+
+    def _semaphore(self, value: int) -> threading.BoundedSemaphore:
+        return threading.BoundedSemaphore(value)
+
+    def find(
+        self,
+        collection,
+        fltr: Filter,
+        sorting: Sorting,
+        pg: Pagination,
+        query: Dict[str, List[str]],
+        projection: Optional[Dict[str, Any]] = None,
+        collation: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[List[Any]], Optional[Err]]:
+        """
+        Same as `pymongo_find`, but returns a list of documents.
+        Raises `Rejected` if the query is not admitted in time.
+        """
+        q, err = pymongo_query(
+            fltr, sorting, pg, query, projection, collation=collation
+        )
+        if q is None:
+            return None, err
+        return self.execute(collection, q), None
+
+    def execute(self, collection, q: Query) -> List[Any]:
+        shape = shape_of(q)
+        gates = self._gates_for(shape)
+        try:
+            acquired = self._admit(shape, gates)
+            try:
+                return list(pymongo_cursor(collection, q))
+            finally:
+                for semaphore in acquired:
+                    semaphore.release()
+        finally:
+            self._release(gates)
+
+    def _admit(
+        self, shape: Shape, gates: List[_Gate]
+    ) -> List[threading.BoundedSemaphore]:
+        started = time.monotonic()
+        deadline = started + self._max_wait
+        wait, taken = self._reserve(shape, gates, started)
+        time.sleep(wait)
+        acquired: List[threading.BoundedSemaphore] = []
+        for gate in gates:
+            if gate.semaphore is None:
+                continue
+            if not gate.semaphore.acquire(
+                timeout=max(0.0, deadline - time.monotonic())
+            ):
+                for semaphore in acquired:
+                    semaphore.release()
+                self._reject(shape, taken, started)
+            acquired.append(gate.semaphore)
+        self.stats.record(True, time.monotonic() - started)
+        return acquired
+
+
+class AdmissionControllerAsync(_Admission):
+    """
+    Runs queries through per-shape concurrency and rate limits
+    (asyncio version for motor). Must be used within a single event loop.
+    """
+
+    def _semaphore(self, value: int) -> asyncio.BoundedSemaphore:
+        return asyncio.BoundedSemaphore(value)
+
+    async def find(
+        self,
+        collection,
+        fltr: Filter,
+        sorting: Sorting,
+        pg: Pagination,
+        query: Dict[str, List[str]],
+        projection: Optional[Dict[str, Any]] = None,
+        collation: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[List[Any]], Optional[Err]]:
+        """
+        Same as `pymongo_find`, but returns a list of documents.
+        Raises `Rejected` if the query is not admitted in time.
+        """
+        q, err = pymongo_query(
+            fltr, sorting, pg, query, projection, collation=collation
+        )
+        if q is None:
+            return None, err
+        return await self.execute(collection, q), None
+
+    async def execute(self, collection, q: Query) -> List[Any]:
+        shape = shape_of(q)
+        gates = self._gates_for(shape)
+        try:
+            acquired = await self._admit(shape, gates)
+            try:
+                return await pymongo_cursor(collection, q).to_list(length=None)
+            finally:
+                for semaphore in acquired:
+                    semaphore.release()
+        finally:
+            self._release(gates)
+
+    async def _admit(
+        self, shape: Shape, gates: List[_Gate]
+    ) -> List[asyncio.BoundedSemaphore]:
+        started = time.monotonic()
+        deadline = started + self._max_wait
+        wait, taken = self._reserve(shape, gates, started)
+        if wait:
+            await asyncio.sleep(wait)
+        acquired: List[asyncio.BoundedSemaphore] = []
+        for gate in gates:
+            if gate.semaphore is None:
+                continue
+            if not await _acquire(gate.semaphore, deadline - time.monotonic()):
+                for semaphore in acquired:
+                    semaphore.release()
+                self._reject(shape, taken, started)
+            acquired.append(gate.semaphore)
+        self.stats.record(True, time.monotonic() - started)
+        return acquired
+
+
+async def _acquire(semaphore: asyncio.BoundedSemaphore, timeout: float) -> bool:
+    if timeout <= 0:
+        if semaphore.locked():
+            return False
+        await semaphore.acquire()
+        return True
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout)
+    except asyncio.TimeoutError:
+        return False
+    return True
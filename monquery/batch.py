@@ -0,0 +1,218 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+from monquery.db import pymongo_cursor, pymongo_query
+from monquery.errors import Err
+from monquery.fltr import Filter
+from monquery.paginate import Pagination
+from monquery.query import Query, collection_key, uses_text
+from monquery.sort import Sorting
+
+
+Result = Tuple[Optional[List[Any]], Optional[Union[Err, Exception]]]
+_Facet = Tuple[Any, List[Tuple[int, Query]]]
+
+
+def pymongo_find_many(
+    fltr: Filter,
+    sorting: Sorting,
+    pg: Pagination,
+    requests: Sequence[Tuple[Any, Dict[str, List[str]]]],
+    projection: Optional[Dict[str, Any]] = None,
+    collation: Optional[Dict[str, Any]] = None,
+    facet: bool = False,
+    max_workers: int = 8,
+) -> List[Result]:
+    """
+    Translates and runs many queries sharing the filter, sorting and pagination.
+
+    The queries run concurrently as separate `find`s.
+    With `facet=True`, paginated queries with a non-empty filter against
+    the same collection are combined into a single `aggregate` with a `$facet`
+    branch per query. The branches are preceded by a `$match` on the union
+    of the filters, so the index usage is limited to that first stage
+    and the combined result is subject to the 16MB document limit.
+    Queries without a filter or a limit, which could read the whole collection
+    into a branch, and `$text` searches, which can't run inside `$facet`,
+    still run as `find`s.
+
+    :param requests: pairs of a collection and a parsed query string
+    :param facet: combine selective, paginated queries against the same collection
+        into one `aggregate`
+    :param max_workers: max number of concurrently running database calls
+    :return: list of documents and error for each request, in order.
+        Exceptions raised by the database call of a request are returned
+        as its error, the other requests are not affected.
+    """
+    results, finds, facets = _plan(
+        fltr, sorting, pg, requests, projection, collation, facet
+    )
+    jobs: List[Callable[[], None]] = [
+        *(_find_job(results, i, collection, q) for i, collection, q in finds),
+        *(_facet_job(results, collection, qs, collation) for collection, qs in facets),
+    ]
+    if len(jobs) == 1:
+        jobs[0]()
+    elif jobs:
+        with ThreadPoolExecutor(min(max_workers, len(jobs))) as pool:
+            for future in [pool.submit(job) for job in jobs]:
+                future.result()
+    return results
+
+
+async def pymongo_find_many_async(
+    fltr: Filter,
+    sorting: Sorting,
+    pg: Pagination,
+    requests: Sequence[Tuple[Any, Dict[str, List[str]]]],
+    projection: Optional[Dict[str, Any]] = None,
+    collation: Optional[Dict[str, Any]] = None,
+    facet: bool = False,
+    max_concurrency: int = 8,
+) -> List[Result]:
+    """
+    Same as `pymongo_find_many`, for motor collections
+
+    :param max_concurrency: max number of concurrently running database calls
+    """
+    results, finds, facets = _plan(
+        fltr, sorting, pg, requests, projection, collation, facet
+    )
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def find(i: int, collection, q: Query) -> None:
+        async with semaphore:
+            try:
+                docs = await pymongo_cursor(collection, q).to_list(length=None)
+            except Exception as e:
+                results[i] = (None, e)
+            else:
+                results[i] = (docs, None)
+
+    async def aggregate(collection, queries: List[Tuple[int, Query]]) -> None:
+        kwargs = {} if collation is None else {"collation": collation}
+        async with semaphore:
+            try:
+                [out] = await collection.aggregate(
+                    facet_pipeline([q for _, q in queries]), **kwargs
+                ).to_list(length=None)
+            except Exception as e:
+                for i, _ in queries:
+                    results[i] = (None, e)
+            else:
+                for n, (i, _) in enumerate(queries):
+                    results[i] = (out[str(n)], None)
+
+    await asyncio.gather(
+        *(find(i, collection, q) for i, collection, q in finds),
+        *(aggregate(collection, queries) for collection, queries in facets),
+    )
+    return results
+
+
+def _plan(
+    fltr: Filter,
+    sorting: Sorting,
+    pg: Pagination,
+    requests: Sequence[Tuple[Any, Dict[str, List[str]]]],
+    projection: Optional[Dict[str, Any]],
+    collation: Optional[Dict[str, Any]],
+    facet: bool,
+) -> Tuple[List[Result], List[Tuple[int, Any, Query]], List[_Facet]]:
+    """
+    Translates the requests and groups them into database calls
+
+    :return: results with translation errors filled in,
+        separate `find`s and `$facet` aggregations to run
+    """
+    results: List[Result] = [(None, None)] * len(requests)
+    groups: Dict[Hashable, _Facet] = {}
+    finds: List[Tuple[int, Any, Query]] = []
+    for i, (collection, query) in enumerate(requests):
+        q, err = pymongo_query(
+            fltr, sorting, pg, query, projection, collation=collation
+        )
+        if q is None:
+            results[i] = (None, err)
+        elif facet and _facetable(q):
+            groups.setdefault(collection_key(collection), (collection, []))[1].append(
+                (i, q)
+            )
+        else:
+            finds.append((i, collection, q))
+    facets: List[_Facet] = []
+    for collection, queries in groups.values():
+        if len(queries) == 1:
+            i, q = queries[0]
+            finds.append((i, collection, q))
+        else:
+            facets.append((collection, queries))
+    return results, finds, facets
+
+
+def _facetable(q: Query) -> bool:
+    return bool(q.filter) and bool(q.pg.limit) and not uses_text(q.filter)
+
+
+def facet_pipeline(queries: Sequence[Query]) -> List[Dict[str, Any]]:
+    """
+    :param queries: translated queries
+    :return: aggregation pipeline running the queries as `$facet` branches
+        named by their positions
+    """
+    return [
+        {"$match": {"$or": [q.filter for q in queries]}},
+        {"$facet": {str(i): _stages(q) for i, q in enumerate(queries)}},
+    ]
+
+
+def _stages(q: Query) -> List[Dict[str, Any]]:
+    stages: List[Dict[str, Any]] = [{"$match": q.filter}]
+    if q.sort is not None:
+        stages.append({"$sort": {q.sort.field or q.sort.name: q.sort.direction}})
+    if q.pg.skip:
+        stages.append({"$skip": q.pg.skip})
+    if q.pg.limit:
+        stages.append({"$limit": q.pg.limit})
+    if q.projection is not None:
+        stages.append({"$project": q.projection})
+    return stages
+
+
+def _find_job(
+    results: List[Result], i: int, collection, q: Query
+) -> Callable[[], None]:
+    def job() -> None:
+        try:
+            results[i] = (list(pymongo_cursor(collection, q)), None)
+        except Exception as e:
+            results[i] = (None, e)
+
+    return job
+
+
+def _facet_job(
+    results: List[Result],
+    collection,
+    queries: List[Tuple[int, Query]],
+    collation: Optional[Dict[str, Any]],
+) -> Callable[[], None]:
+    def job() -> None:
+        kwargs = {} if collation is None else {"collation": collation}
+        try:
+            out = next(
+                iter(
+                    collection.aggregate(
+                        facet_pipeline([q for _, q in queries]), **kwargs
+                    )
+                )
+            )
+        except Exception as e:
+            for i, _ in queries:
+                results[i] = (None, e)
+            return
+        for n, (i, _) in enumerate(queries):
+            results[i] = (out[str(n)], None)
+
+    return job
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from monquery.db import pymongo_cursor, pymongo_query
+from monquery.errors import Err
+from monquery.fltr import Filter
+from monquery.paginate import Pagination
+from monquery.query import Query, collection_key
+from monquery.sort import Sorting
+
+
+class SingleFlightStats:
+    """
+    Counters of a single-flight group
+    """
+
+    __slots__ = ("executed", "coalesced", "errors", "timeouts")
+
+    def __init__(self) -> None:
+        self.executed: int = 0
+        self.coalesced: int = 0
+        self.errors: int = 0
+        self.timeouts: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+        }
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.as_dict()!r})"
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent queries (threaded version).
+    The first caller runs the query, callers arriving while it is in flight
+    wait for its materialized result instead of running their own query.
+    Exceptions of the query are raised to every waiting caller.
+
+    Documents are shared between the callers and must not be mutated.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        """
+        :param timeout: max seconds a duplicate caller waits for the result,
+            `concurrent.futures.TimeoutError` is raised after that
+        """
+        self._timeout: Optional[float] = timeout
+        self._lock: threading.Lock = threading.Lock()
+        self._in_flight: Dict[Hashable, "Future[List[Any]]"] = {}
+        self.stats: SingleFlightStats = SingleFlightStats()
+
+    def find(
+        self,
+        collection,
+        fltr: Filter,
+        sorting: Sorting,
+        pg: Pagination,
+        query: Dict[str, List[str]],
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[List[Any]], Optional[Err]]:
+        """
+        Same as `pymongo_find`, but returns a list of documents
+        """
+        q, err = pymongo_query(fltr, sorting, pg, query, projection)
+        if q is None:
+            return None, err
+        return self.execute(collection, q), None
+
+    def execute(self, collection, q: Query) -> List[Any]:
+        key = (collection_key(collection), q.key())
+        with self._lock:
+            fut = self._in_flight.get(key)
+            leader = fut is None
+            if fut is None:
+                fut = self._in_flight[key] = Future()
+                self.stats.executed += 1
+            else:
+                self.stats.coalesced += 1
+        if leader:
+            try:
+                docs = list(pymongo_cursor(collection, q))
+            except BaseException as e:
+                self._forget(key, failed=True)
+                fut.set_exception(e)
+                raise
+            self._forget(key, failed=False)
+            fut.set_result(docs)
+            return list(docs)
+        try:
+            return list(fut.result(self._timeout))
+        except FutureTimeoutError:
+            with self._lock:
+                self.stats.timeouts += 1
+            raise
+
+    def _forget(self, key: Hashable, failed: bool) -> None:
+        with self._lock:
+            del self._in_flight[key]
+            if failed:
+                self.stats.errors += 1
+
+
+class SingleFlightAsync:
+    """
+    Coalesces identical concurrent queries (asyncio version for motor).
+    The query runs in a separate task, so cancelling any of the callers
+    doesn't affect the others.
+
+    Documents are shared between the callers and must not be mutated.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        """
+        :param timeout: max seconds a duplicate caller waits for the result,
+            `asyncio.TimeoutError` is raised after that
+        """
+        self._timeout: Optional[float] = timeout
+        self._in_flight: Dict[Hashable, "asyncio.Task[List[Any]]"] = {}
+        self.stats: SingleFlightStats = SingleFlightStats()
+
+    async def find(
+        self,
+        collection,
+        fltr: Filter,
+        sorting: Sorting,
+        pg: Pagination,
+        query: Dict[str, List[str]],
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[List[Any]], Optional[Err]]:
+        """
+        Same as `pymongo_find`, but returns a list of documents
+        """
+        q, err = pymongo_query(fltr, sorting, pg, query, projection)
+        if q is None:
+            return None, err
+        return await self.execute(collection, q), None
+
+    async def execute(self, collection, q: Query) -> List[Any]:
+        key = (collection_key(collection), q.key())
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._in_flight[key] = asyncio.ensure_future(
+                pymongo_cursor(collection, q).to_list(length=None)
+            )
+            task.add_done_callback(lambda t: self._done(key, t))
+            self.stats.executed += 1
+            timeout = None
+        else:
+            self.stats.coalesced += 1
+            timeout = self._timeout
+        try:
+            return list(await asyncio.wait_for(asyncio.shield(task), timeout))
+        except asyncio.TimeoutError:
+            if not task.done():
+                self.stats.timeouts += 1
+            raise
+
+    def _done(self, key: Hashable, task: "asyncio.Task[List[Any]]") -> None:
+        del self._in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.stats.errors += 1
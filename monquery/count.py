@@ -0,0 +1,234 @@
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from monquery.errors import Err
+from monquery.fltr import Filter
+from monquery.query import uses_text
+
+AUTO = "auto"
+EXACT = "exact"
+CAPPED = "capped"
+SAMPLED = "sampled"
+ESTIMATED = "estimated"
+
+# plan stages reading documents one by one instead of walking index bounds
+_SCAN_STAGES = frozenset({"COLLSCAN"})
+
+
+class Count(NamedTuple):
+    """
+    A number of documents matching a filter and how it was obtained:
+
+    - `exact`: the precise count
+    - `capped`: there are more than `value` documents
+    - `sampled`: estimated from a random sample, the real count lies
+      between `lower` and `upper` with the requested confidence
+    - `estimated`: the collection size from its metadata, may be off
+      after unclean shutdowns or with orphaned documents in sharded clusters
+    """
+
+    value: int
+    mode: str
+    lower: Optional[int] = None
+    upper: Optional[int] = None
+
+    def __str__(self) -> str:
+        if self.mode == CAPPED:
+            return f"{self.value:,}+"
+        if self.mode == EXACT:
+            return f"{self.value:,}"
+        return f"about {self.value:,}"
+
+
+def capped_count(
+    collection,
+    fltr: Dict[str, Any],
+    cap: int = 10000,
+    collation: Optional[Dict[str, Any]] = None,
+) -> Count:
+    """
+    Counts the documents, but stops at `cap + 1` of them.
+
+    :return: exact count or `cap` in `capped` mode if there are more documents
+    """
+    kwargs = {} if collation is None else {"collation": collation}
+    n = collection.count_documents(fltr, limit=cap + 1, **kwargs)
+    if n > cap:
+        return Count(cap, CAPPED, cap + 1, None)
+    return Count(n, EXACT, n, n)
+
+
+def sampled_count(
+    collection,
+    fltr: Dict[str, Any],
+    sample_size: int = 1000,
+    z: float = 1.96,
+    collation: Optional[Dict[str, Any]] = None,
+) -> Count:
+    """
+    Estimates the count from the share of matching documents in a random sample
+    of the collection. Cheap regardless of the filter, but only meaningful
+    for filters matching a noticeable fraction of the documents.
+    Doesn't support `$text` filters.
+
+    :param sample_size: number of documents to sample
+    :param z: z-score of the confidence interval, 1.96 for 95%
+    :return: estimate with Wilson score confidence interval
+    """
+    total = collection.estimated_document_count()
+    matched = _sample(collection, fltr, sample_size, collation)
+    return _estimate(matched, total, sample_size, z)
+
+
+def _sample(
+    collection,
+    fltr: Dict[str, Any],
+    sample_size: int,
+    collation: Optional[Dict[str, Any]],
+) -> int:
+    """
+    :return: number of matching documents in a random sample of the collection
+    """
+    kwargs = {} if collation is None else {"collation": collation}
+    return next(
+        iter(
+            collection.aggregate(
+                [
+                    {"$sample": {"size": sample_size}},
+                    {"$match": fltr},
+                    {"$count": "n"},
+                ],
+                **kwargs,
+            )
+        ),
+        {"n": 0},
+    )["n"]
+
+
+def _estimate(matched: int, total: int, sample_size: int, z: float) -> Count:
+    if sample_size >= total:
+        return Count(matched, EXACT, matched, matched)
+    p = matched / sample_size
+    denom = 1 + z * z / sample_size
+    centre = (p + z * z / (2 * sample_size)) / denom
+    half = (
+        z
+        * math.sqrt(p * (1 - p) / sample_size + z * z / (4 * sample_size**2))
+        / denom
+    )
+    return Count(
+        round(p * total),
+        SAMPLED,
+        max(matched, math.floor((centre - half) * total)),
+        min(total, math.ceil((centre + half) * total)),
+    )
+
+
+def plan_stages(
+    collection, fltr: Dict[str, Any], collation: Optional[Dict[str, Any]] = None
+) -> Set[str]:
+    """
+    :return: stages of the winning plan of the filter,
+        as chosen by the query planner without running the query
+    """
+    find: Dict[str, Any] = {"find": collection.name, "filter": fltr}
+    if collation is not None:
+        find["collation"] = collation
+    explain = collection.database.command(
+        {"explain": find, "verbosity": "queryPlanner"}
+    )
+    stages: Set[str] = set()
+    _collect_stages(explain["queryPlanner"]["winningPlan"], stages)
+    return stages
+
+
+def _collect_stages(plan: Any, stages: Set[str]) -> None:
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.add(plan["stage"])
+        for value in plan.values():
+            _collect_stages(value, stages)
+    elif isinstance(plan, list):
+        for value in plan:
+            _collect_stages(value, stages)
+
+
+def count(
+    collection,
+    fltr: Dict[str, Any],
+    mode: str = AUTO,
+    cap: int = 10000,
+    sample_size: int = 1000,
+    collation: Optional[Dict[str, Any]] = None,
+    min_matches: int = 30,
+) -> Count:
+    """
+    Counts the documents matching a filter.
+
+    In `auto` mode the cheapest suitable way is chosen:
+    the collection metadata for an empty filter, a capped count
+    for filters the planner answers by walking index bounds
+    (the count stops after `cap + 1` index keys),
+    and sampling for filters requiring a collection scan
+    unless the collection is small enough to be scanned.
+    Samples with fewer than `min_matches` matching documents
+    can't tell a rare match from none, the capped count is used then.
+
+    The other modes force a way: `exact` counts every matching document,
+    `capped` and `sampled` as above, `estimated` reads the collection size
+    from its metadata and only accepts the empty filter.
+
+    :param mode: `auto`, `exact`, `capped`, `sampled` or `estimated`
+    :param cap: max number of documents to count
+    :param sample_size: number of documents to sample
+    :param min_matches: min number of matching sampled documents
+        for a sampled estimate in `auto` mode
+    :raises ValueError: on unknown modes and non-empty filters in `estimated` mode
+    """
+    if mode == EXACT:
+        kwargs = {} if collation is None else {"collation": collation}
+        n = collection.count_documents(fltr, **kwargs)
+        return Count(n, EXACT, n, n)
+    if mode == CAPPED:
+        return capped_count(collection, fltr, cap, collation)
+    if mode == SAMPLED:
+        return sampled_count(collection, fltr, sample_size, collation=collation)
+    if mode == ESTIMATED:
+        if fltr:
+            raise ValueError("The estimated count is only available for all documents")
+        return Count(collection.estimated_document_count(), ESTIMATED, None, None)
+    if mode != AUTO:
+        raise ValueError(f"Unknown count mode: {mode!r}")
+    if not fltr:
+        return Count(collection.estimated_document_count(), ESTIMATED, None, None)
+    if uses_text(fltr) or not plan_stages(collection, fltr, collation) & _SCAN_STAGES:
+        return capped_count(collection, fltr, cap, collation)
+    total = collection.estimated_document_count()
+    if total <= max(cap, sample_size):
+        return capped_count(collection, fltr, cap, collation)
+    matched = _sample(collection, fltr, sample_size, collation)
+    if matched < min_matches:
+        return capped_count(collection, fltr, cap, collation)
+    return _estimate(matched, total, sample_size, 1.96)
+
+
+def pymongo_count(
+    collection,
+    fltr: Filter,
+    query: Dict[str, List[str]],
+    mode: str = AUTO,
+    cap: int = 10000,
+    sample_size: int = 1000,
+    collation: Optional[Dict[str, Any]] = None,
+    min_matches: int = 30,
+) -> Tuple[Optional[Count], Optional[Err]]:
+    """
+    Counts the documents matching a query string, see `count`.
+    Pagination and sorting params of the query string are ignored.
+
+    :return: count and error
+    """
+    f, err = fltr.from_query(query)
+    if err:
+        return None, err
+    return count(collection, f, mode, cap, sample_size, collation, min_matches), None
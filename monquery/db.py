@@ -1,6 +1,19 @@
-from typing import Dict, List, Any, Optional
+from __future__ import annotations
 
-from monquery import Filter, Sorting, Pagination
+import os
+import threading
+import time
+import weakref
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Dict, List, Any, Optional, Tuple, Callable, Iterable
+
+    from monquery.errors import Err
+    from monquery.fltr import Filter
+    from monquery.paginate import Pagination
+    from monquery.query import Query
+    from monquery.sort import Sorting, SortingOption
 
 
 def pymongo_find(
@@ -10,23 +23,384 @@ def pymongo_find(
     pg: Pagination,
     query: Dict[str, List[str]],
     projection: Optional[Dict[str, Any]] = None,
+    raw: bool = False,
+    collect_all: bool = False,
+    collation: Optional[Dict[str, Any]] = None,
 ):
-    f, err = fltr.from_query(query)
-    if err:
-        return None, err
-    p, err = pg.from_query(query)
-    if err:
-        return None, err
-    s, err = sorting.from_query(query)
-    if err:
+    """
+    :param raw: return documents as `bson.raw_bson.RawBSONDocument`,
+        see `monquery.raw` for decoding only the needed fields
+    :param collect_all: validate every param of the filter, pagination
+        and sorting and report every error found as `monquery.errors.ErrorList`
+    :param collation: collation of the query, e.g. `CASE_INSENSITIVE_COLLATION`
+        for `ParamPrefixCi`
+    :return: a cursor and error
+    """
+    q, err = pymongo_query(fltr, sorting, pg, query, projection, collect_all, collation)
+    if q is None:
         return None, err
+    return pymongo_cursor(collection, q, raw), None
+
+
+def pymongo_query(
+    fltr: Filter,
+    sorting: Sorting,
+    pg: Pagination,
+    query: Dict[str, List[str]],
+    projection: Optional[Dict[str, Any]] = None,
+    collect_all: bool = False,
+    collation: Optional[Dict[str, Any]] = None,
+) -> Tuple[Optional[Query], Optional[Err]]:
+    """
+    Translates a query string without running it, see `pymongo_find`.
+
+    :return: translated query and error
+    """
+    from monquery.query import Query
+
+    if collect_all:
+        from monquery.errors import ErrorList
+
+        f, f_err = fltr.from_query_all(query)
+        p, p_err = pg.from_query_all(query)
+        s, s_err = sorting.from_query(query)
+        if not f_err and not s_err:
+            s_err = _check_text_score(f, s, sorting)
+        errors = ErrorList.of(f_err, p_err, s_err)
+        if errors:
+            return None, errors
+    else:
+        f, err = fltr.from_query(query)
+        if err:
+            return None, err
+        p, err = pg.from_query(query)
+        if err:
+            return None, err
+        s, err = sorting.from_query(query)
+        if err:
+            return None, err
+        err = _check_text_score(f, s, sorting)
+        if err:
+            return None, err
+    return Query(f, s, p, projection, collation), None
+
+
+def _check_text_score(
+    f: Dict[str, Any],
+    s: Optional[SortingOption],
+    sorting: Sorting,
+) -> Optional[Err]:
+    # text score is only defined for $text queries, the server would fail the query
+    from monquery.errors import ParamError, TEXT_SCORE_WITHOUT_TEXT
+    from monquery.query import uses_text
+    from monquery.sort import TEXT_SCORE
+
+    if s is None or s.direction != TEXT_SCORE or uses_text(f):
+        return None
+    return ParamError(TEXT_SCORE_WITHOUT_TEXT, sorting.key(), s.name)
+
+
+def pymongo_cursor(collection, q: Query, raw: bool = False):
+    """
+    :param collection: a pymongo (or motor) collection
+    :param q: translated query
+    :param raw: see `pymongo_find`
+    :return: a cursor for the query
+    """
+    if raw:
+        from monquery.raw import raw_collection
+
+        collection = raw_collection(collection)
+    kwargs = {} if q.collation is None else {"collation": q.collation}
     cursor = (
-        collection.find(f, projection) if projection is not None else collection.find(f)
+        collection.find(q.filter, q.projection, **kwargs)
+        if q.projection is not None
+        else collection.find(q.filter, **kwargs)
     )
+    s, p = q.sort, q.pg
     if s is not None:
         cursor = cursor.sort([(s.field or s.name, s.direction)])
     if p.skip:
         cursor = cursor.skip(p.skip)
     if p.limit is not None:
         cursor = cursor.limit(p.limit)
-    return cursor, None
+    return cursor
+
+
+class PoolStats:
+    """
+    Connection pool checkout statistics of a client
+    and the errors of its warm-up
+    """
+
+    __slots__ = (
+        "checkouts",
+        "failures",
+        "total_wait",
+        "max_wait",
+        "prewarm_errors",
+        "last_error",
+        "_lock",
+    )
+
+    def __init__(self) -> None:
+        self.checkouts: int = 0
+        self.failures: int = 0
+        self.total_wait: float = 0.0
+        self.max_wait: float = 0.0
+        self.prewarm_errors: int = 0
+        self.last_error: Optional[BaseException] = None
+        self._lock: threading.Lock = threading.Lock()
+
+    def record(self, wait: float, failed: bool = False) -> None:
+        """
+        :param wait: seconds spent waiting for a connection
+        :param failed: whether the checkout failed (e.g. wait queue timeout)
+        """
+        with self._lock:
+            if failed:
+                self.failures += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_error(self, error: BaseException) -> None:
+        """
+        :param error: exception raised while warming up the client
+        """
+        with self._lock:
+            self.prewarm_errors += 1
+            self.last_error = error
+
+    def mean_wait(self) -> float:
+        attempts = self.checkouts + self.failures
+        return self.total_wait / attempts if attempts else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "failures": self.failures,
+            "mean_wait": self.mean_wait(),
+            "max_wait": self.max_wait,
+            "prewarm_errors": self.prewarm_errors,
+            "last_error": None if self.last_error is None else repr(self.last_error),
+        }
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.as_dict()!r})"
+
+
+class ClientRegistry:
+    """
+    Lazily created, per-process MongoDB clients.
+    Endpoints can be registered at import time of a pre-fork server (e.g. gunicorn):
+    clients are only created on first use, and the clients inherited
+    from the parent process are dropped in forked children.
+    """
+
+    def __init__(self, client_factory: Optional[Callable[..., Any]] = None):
+        """
+        :param client_factory: creates a client from a URI and keyword options,
+            `pymongo.MongoClient` by default. It must accept `event_listeners`
+            (as `motor.motor_asyncio.AsyncIOMotorClient` does) and attach them
+            to the client, the pool statistics are collected by one of them.
+        """
+        self._factory: Optional[Callable[..., Any]] = client_factory
+        self._endpoints: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._clients: Dict[str, Any] = {}
+        self._stats: Dict[str, PoolStats] = {}
+        self._lock: threading.Lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            ref = weakref.ref(self)
+
+            def after_fork() -> None:
+                registry = ref()
+                if registry is not None:
+                    registry._after_fork()
+
+            os.register_at_fork(after_in_child=after_fork)
+
+    def register(
+        self,
+        name: str,
+        uri: str,
+        max_pool_size: int = 100,
+        min_pool_size: int = 0,
+        wait_queue_timeout_ms: Optional[int] = None,
+        **options: Any,
+    ) -> None:
+        """
+        :param name: endpoint name
+        :param uri: MongoDB connection string
+        :param max_pool_size: `maxPoolSize` of the client
+        :param min_pool_size: `minPoolSize` of the client
+        :param wait_queue_timeout_ms: `waitQueueTimeoutMS` of the client
+        :param options: any other client options
+        """
+        with self._lock:
+            self._endpoints[name] = (
+                uri,
+                {
+                    "maxPoolSize": max_pool_size,
+                    "minPoolSize": min_pool_size,
+                    "waitQueueTimeoutMS": wait_queue_timeout_ms,
+                    **options,
+                },
+            )
+            self._stats[name] = PoolStats()
+
+    def client(self, name: str):
+        """
+        :param name: endpoint name
+        :return: the client of the current process, created on first use
+        """
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                uri, options = self._endpoints[name]
+                client = self._clients[name] = self._create(
+                    uri, options, self._stats[name]
+                )
+        return client
+
+    def collection(self, name: str, database: str, collection: str):
+        """
+        :return: a collection of the endpoint's client
+        """
+        return self.client(name)[database][collection]
+
+    def prewarm(self, names: Optional[Iterable[str]] = None) -> threading.Thread:
+        """
+        Creates the clients and opens their first connections in a background thread,
+        so that the first requests of a worker don't pay for it.
+        Clients keep `minPoolSize` connections open by themselves afterwards.
+        Errors (e.g. an unreachable server) are recorded in the endpoint's `stats`.
+        Only for blocking clients, use `prewarm_async` for motor.
+
+        :param names: endpoints to warm up, all by default
+        :return: the started daemon thread
+        """
+        targets = self._targets(names)
+
+        def warm() -> None:
+            for name in targets:
+                try:
+                    result = self.client(name).admin.command("ping")
+                    if hasattr(result, "__await__"):
+                        close = getattr(result, "close", None)
+                        if close is not None:
+                            close()
+                        raise TypeError(
+                            f"Client of {name!r} is asynchronous, use prewarm_async()"
+                        )
+                except Exception as e:
+                    self._stats[name].record_error(e)
+
+        thread = threading.Thread(target=warm, name="monquery-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    async def prewarm_async(self, names: Optional[Iterable[str]] = None) -> None:
+        """
+        Same as `prewarm`, for motor clients: pings the endpoints concurrently
+        in the running event loop.
+
+        :param names: endpoints to warm up, all by default
+        """
+        import asyncio
+
+        async def warm(name: str) -> None:
+            try:
+                await self.client(name).admin.command("ping")
+            except Exception as e:
+                self._stats[name].record_error(e)
+
+        await asyncio.gather(*(warm(name) for name in self._targets(names)))
+
+    def stats(self, name: str) -> PoolStats:
+        """
+        :param name: endpoint name
+        :return: pool checkout statistics of the endpoint in the current process
+        """
+        return self._stats[name]
+
+    def close(self) -> None:
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
+
+    def _targets(self, names: Optional[Iterable[str]]) -> List[str]:
+        targets = list(self._endpoints if names is None else names)
+        for name in targets:
+            if name not in self._endpoints:
+                raise KeyError(name)
+        return targets
+
+    def _create(self, uri: str, options: Dict[str, Any], stats: PoolStats):
+        options = {k: v for k, v in options.items() if v is not None}
+        listeners = [*options.pop("event_listeners", []), _pool_listener(stats)]
+        if self._factory is not None:
+            return self._factory(uri, event_listeners=listeners, **options)
+        from pymongo import MongoClient
+
+        return MongoClient(uri, event_listeners=listeners, **options)
+
+    def _after_fork(self) -> None:
+        # the inherited clients must not be used nor closed in the child
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._stats = {name: PoolStats() for name in self._endpoints}
+
+
+def _pool_listener(stats: PoolStats):
+    from pymongo import monitoring
+
+    class PoolListener(monitoring.ConnectionPoolListener):
+        def __init__(self) -> None:
+            self._started = threading.local()
+
+        def connection_check_out_started(self, event) -> None:
+            self._started.at = time.monotonic()
+
+        def connection_checked_out(self, event) -> None:
+            stats.record(self._waited(event))
+
+        def connection_check_out_failed(self, event) -> None:
+            stats.record(self._waited(event), failed=True)
+
+        def _waited(self, event) -> float:
+            duration = getattr(event, "duration", None)
+            if duration is not None:
+                return duration
+            return time.monotonic() - getattr(self._started, "at", time.monotonic())
+
+        def pool_created(self, event) -> None:
+            pass
+
+        def pool_ready(self, event) -> None:
+            pass
+
+        def pool_cleared(self, event) -> None:
+            pass
+
+        def pool_closed(self, event) -> None:
+            pass
+
+        def connection_created(self, event) -> None:
+            pass
+
+        def connection_ready(self, event) -> None:
+            pass
+
+        def connection_closed(self, event) -> None:
+            pass
+
+        def connection_checked_in(self, event) -> None:
+            pass
+
+    return PoolListener()
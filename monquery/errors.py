@@ -0,0 +1,155 @@
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+
+INVALID_VALUE = "invalid_value"
+INVALID_ARRAY = "invalid_array"
+UNEXPECTED_VALUE = "unexpected_value"
+NOT_INTEGER = "not_integer"
+UNEXPECTED_SORTING_KEY = "unexpected_sorting_key"
+TOO_SHORT = "too_short"
+TOO_LONG = "too_long"
+TEXT_SCORE_WITHOUT_TEXT = "text_score_without_text"
+
+_MESSAGES: Dict[str, str] = {
+    INVALID_VALUE: "Error while parsing {param!r} param. {detail}",
+    INVALID_ARRAY: "Error while parsing {param!r} param. (Array format error)",
+    UNEXPECTED_VALUE: "Unexpected value: {value!r} of param {param!r}",
+    NOT_INTEGER: "value of {param!r} must be integer",
+    UNEXPECTED_SORTING_KEY: "unexpected sorting key: {value!r}",
+    TOO_SHORT: "Error while parsing {param!r} param. "
+    "Value must be at least {detail} characters long",
+    TOO_LONG: "Error while parsing {param!r} param. "
+    "Value must be at most {detail} characters long",
+    TEXT_SCORE_WITHOUT_TEXT: "sorting by {value!r} requires a text search",
+}
+
+
+class ParamError:
+    """
+    A structured query translation error.
+    The message is only formatted when the error is converted to string,
+    and the error compares equal to its message for backwards compatibility
+    with plain string errors.
+    Serialize it with `str(err)` or `err.as_dict()`, like `ErrorList`.
+    """
+
+    __slots__ = ("code", "param", "value", "detail", "_fmt", "_message")
+
+    def __init__(
+        self,
+        code: str,
+        param: str,
+        value: Any = None,
+        detail: Optional[str] = None,
+        fmt: Optional[str] = None,
+    ):
+        self.code: str = code
+        self.param: str = param
+        self.value: Any = value
+        self.detail: Optional[str] = detail
+        self._fmt: str = fmt or _MESSAGES.get(code, "{param!r}: {code}")
+        self._message: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self._message is None:
+            self._message = self._fmt.format(
+                code=self.code, param=self.param, value=self.value, detail=self.detail
+            )
+        return self._message
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ParamError):
+            return (self.code, self.param, self.value, str(self)) == (
+                other.code,
+                other.param,
+                other.value,
+                str(other),
+            )
+        if isinstance(other, str):
+            return str(self) == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(code={self.code!r}, param={self.param!r}, "
+            f"value={self.value!r}, detail={self.detail!r})"
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        :return: JSON-friendly representation of the error
+        """
+        return {
+            "param": self.param,
+            "value": self.value,
+            "code": self.code,
+            "message": str(self),
+        }
+
+
+class ErrorList:
+    """
+    All errors found while translating a query in "collect all" mode.
+    Like `ParamError`, it is serialized with `str(err)`, joining the messages
+    with "; ", or `err.as_dict()`, giving a list of the errors' dicts.
+    """
+
+    __slots__ = ("errors",)
+
+    def __init__(self, errors: List[Union[str, ParamError]]):
+        self.errors: List[Union[str, ParamError]] = errors
+
+    @classmethod
+    def of(cls, *errors: Optional["Err"]) -> Optional["ErrorList"]:
+        """
+        :param errors: errors to merge, `None`s are skipped
+            and nested lists are flattened
+        :return: merged errors or `None` if there are none
+        """
+        merged: List[Union[str, ParamError]] = []
+        for err in errors:
+            if isinstance(err, ErrorList):
+                merged.extend(err.errors)
+            elif err:
+                merged.append(err)
+        return cls(merged) if merged else None
+
+    def __bool__(self) -> bool:
+        return bool(self.errors)
+
+    def __len__(self) -> int:
+        return len(self.errors)
+
+    def __iter__(self) -> Iterator[Union[str, ParamError]]:
+        return iter(self.errors)
+
+    def __str__(self) -> str:
+        return "; ".join(str(e) for e in self.errors)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ErrorList):
+            return self.errors == other.errors
+        if isinstance(other, str):
+            return str(self) == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.errors!r})"
+
+    def as_dict(self) -> List[Dict[str, Any]]:
+        """
+        :return: JSON-friendly representation of the errors
+        """
+        return [
+            e.as_dict() if isinstance(e, ParamError) else {"message": e}
+            for e in self.errors
+        ]
+
+
+Err = Union[str, ParamError, ErrorList]
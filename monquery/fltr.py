@@ -1,7 +1,19 @@
-import json
 from abc import abstractmethod, ABC
+import re
 from typing import List, Dict, Tuple, Optional, Any, Callable
 
+from monquery.errors import (
+    Err,
+    ErrorList,
+    ParamError,
+    INVALID_VALUE,
+    INVALID_ARRAY,
+    UNEXPECTED_VALUE,
+    TOO_SHORT,
+    TOO_LONG,
+)
+from monquery.parse import parse_string
+from monquery.sort import SortingOption, text_score_option
 
 Conv = Callable[[str], Tuple[Any, Optional[str]]]
 
@@ -21,13 +33,20 @@ class Param(ABC):
     @abstractmethod
     def filter_from(
         self, values: List[str]
-    ) -> Tuple[Dict[str, Any], Optional[str]]:  # pragma: no cover
+    ) -> Tuple[Dict[str, Any], Optional[Err]]:  # pragma: no cover
         """
         :param values: the values of the parameter from a query string
         :return: MongoDB filter and error
         """
         pass
 
+    def binding(self) -> Optional[Tuple[str, Conv]]:
+        """
+        :return: the target field and the converter of its values,
+            if the param compares a single field with converted values
+        """
+        return None
+
 
 class ParamMultiValue(Param):
     __slots__ = (
@@ -46,12 +65,15 @@ class ParamMultiValue(Param):
     def name(self) -> str:
         return self._name
 
-    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[str]]:
+    def binding(self) -> Optional[Tuple[str, Conv]]:
+        return self._target_field, self._conv
+
+    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[Err]]:
         converted = []
         for value in values:
             c, err = self._conv(value)
             if err:
-                return {}, f"Error while parsing {self._name!r} param. {err}"
+                return {}, ParamError(INVALID_VALUE, self._name, value, err)
             converted.append(c)
         return {self._target_field: {self._operator: converted}}, None
 
@@ -79,10 +101,13 @@ class ParamSingleValue(Param):
     def name(self) -> str:
         return self._name
 
-    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[str]]:
+    def binding(self) -> Optional[Tuple[str, Conv]]:
+        return self._target_field, self._conv
+
+    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[Err]]:
         converted, err = self._conv(values[0])
         if err:
-            return {}, f"Error while parsing {self._name!r} param. {err}"
+            return {}, ParamError(INVALID_VALUE, self._name, values[0], err)
         return {self._target_field: {self._operator: converted}}, None
 
     def __repr__(self):
@@ -121,7 +146,10 @@ class ParamEq(Param):
     def name(self) -> str:
         return self._origin.name()
 
-    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[str]]:
+    def binding(self) -> Optional[Tuple[str, Conv]]:
+        return self._origin.binding()
+
+    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[Err]]:
         return self._origin.filter_from(values)
 
     def __repr__(self):
@@ -157,7 +185,10 @@ class ParamNe(Param):
     def name(self) -> str:
         return self._origin.name()
 
-    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[str]]:
+    def binding(self) -> Optional[Tuple[str, Conv]]:
+        return self._origin.binding()
+
+    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[Err]]:
         return self._origin.filter_from(values)
 
     def __repr__(self):
@@ -178,7 +209,10 @@ class ParamMax(Param):
     def name(self) -> str:
         return self._origin.name()
 
-    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[str]]:
+    def binding(self) -> Optional[Tuple[str, Conv]]:
+        return self._origin.binding()
+
+    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[Err]]:
         return self._origin.filter_from(values)
 
     def __repr__(self):
@@ -199,7 +233,10 @@ class ParamMin(Param):
     def name(self) -> str:
         return self._origin.name()
 
-    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[str]]:
+    def binding(self) -> Optional[Tuple[str, Conv]]:
+        return self._origin.binding()
+
+    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[Err]]:
         return self._origin.filter_from(values)
 
     def __repr__(self):
@@ -223,20 +260,39 @@ class ParamArray(Param):
     def name(self) -> str:
         return self._name
 
-    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[str]]:
+    def binding(self) -> Optional[Tuple[str, Conv]]:
+        return self._target_field, self._conv
+
+    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[Err]]:
         converted = []
         try:
-            values = json.loads(values[0])
-        except json.decoder.JSONDecodeError:
-            return {}, f"Error while parsing {self._name!r} param. (Array format error)"
+            values = _json().loads(values[0])
+        except ValueError:
+            return {}, ParamError(INVALID_ARRAY, self._name, values[0])
         for value in values:
             c, err = self._conv(value)
             if err:
-                return {}, f"Error while parsing {self._name!r} param. {err}"
+                return {}, ParamError(INVALID_VALUE, self._name, value, err)
             converted.append(c)
         return {self._target_field: {self._operator: converted}}, None
 
 
+_json_module: Any = None
+
+
+def _json() -> Any:
+    """
+    :return: the `json` module, imported on first use
+        to keep it out of the import of monquery
+    """
+    global _json_module
+    if _json_module is None:
+        import json
+
+        _json_module = json
+    return _json_module
+
+
 class Filter(ABC):
     """
     An interface for query string to MongoDB filter translation
@@ -245,36 +301,70 @@ class Filter(ABC):
     @abstractmethod
     def from_query(
         self, q: Dict[str, List[str]]
-    ) -> Tuple[Dict[str, Any], Optional[str]]:
+    ) -> Tuple[Dict[str, Any], Optional[Err]]:
         """
         :param q: a parsed query string
         :return: MongoDB filter and error
         """
         pass
 
+    def from_query_all(
+        self, q: Dict[str, List[str]]
+    ) -> Tuple[Dict[str, Any], Optional[Err]]:
+        """
+        Same as `from_query`, but reports every error found,
+        used by the "collect all" mode of `pymongo_find`.
+        Filters which can't collect errors report the first one.
+        """
+        return self.from_query(q)
+
 
 class FilterSimple(Filter):
-    __slots__ = ("_fltrs", "_repr")
+    __slots__ = ("_fltrs", "_repr", "_collect_all")
 
-    def __init__(self, params: List[Param]):
+    def __init__(self, params: List[Param], collect_all: bool = False):
+        """
+        :param params: filtering params
+        :param collect_all: validate all the params instead of stopping
+            at the first error and return every error found as `ErrorList`
+        """
         self._fltrs: Dict[str, Param] = {param.name(): param for param in params}
+        self._collect_all: bool = collect_all
         self._repr: str = f"{self.__class__.__name__}({sorted(self._fltrs.values(), key=lambda i: i.name())!r})"
 
     def from_query(
         self, q: Dict[str, List[str]]
-    ) -> Tuple[Dict[str, Any], Optional[str]]:
+    ) -> Tuple[Dict[str, Any], Optional[Err]]:
+        return self._from_query(q, self._collect_all)
+
+    def from_query_all(
+        self, q: Dict[str, List[str]]
+    ) -> Tuple[Dict[str, Any], Optional[Err]]:
+        return self._from_query(q, True)
+
+    def _from_query(
+        self, q: Dict[str, List[str]], collect_all: bool
+    ) -> Tuple[Dict[str, Any], Optional[Err]]:
         combined_filter = []
+        errors: List[Err] = []
         for name, values in q.items():
             proc = self._fltrs.get(name)
             if proc:
                 fltr, err = proc.filter_from(values)
                 if err:
-                    return {}, err
+                    if not collect_all:
+                        return {}, err
+                    errors.append(err)
                 combined_filter.append(fltr)
+        if errors:
+            return {}, ErrorList.of(*errors)
         if combined_filter:
             return {"$and": combined_filter}, None
         return {}, None
 
+    def params(self) -> List[Param]:
+        return list(self._fltrs.values())
+
     def __repr__(self):
         return self._repr
 
@@ -380,12 +470,174 @@ class ParamOf(Param):
     def name(self) -> str:
         return self._name
 
-    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[str]]:
+    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[Err]]:
         converted, err = self._conv(values[0])
         if err:
-            return {}, err
+            return {}, ParamError(
+                INVALID_VALUE, self._name, values[0], err, fmt="{detail}"
+            )
         if converted in self._cases:
             return self._cases[converted], None
         if self._default_case is not None:
             return self._default_case, None
-        return {}, f"Unexpected value: {values[0]!r} of param {self._name!r}"
+        return {}, ParamError(UNEXPECTED_VALUE, self._name, values[0])
+
+
+CASE_INSENSITIVE_COLLATION: Dict[str, Any] = {"locale": "en", "strength": 2}
+
+
+def _check_length(
+    name: str, value: str, min_length: int, max_length: int
+) -> Optional[ParamError]:
+    if len(value) < min_length:
+        return ParamError(TOO_SHORT, name, value, str(min_length))
+    if len(value) > max_length:
+        return ParamError(TOO_LONG, name, value, str(max_length))
+    return None
+
+
+class ParamPrefix(Param):
+    """
+    Matches string values starting with the given prefix.
+    The value is escaped and anchored, so the query is served
+    by an index range scan rather than a collection scan.
+    """
+
+    __slots__ = ("_name", "_target_field", "_min_length", "_max_length")
+
+    def __init__(
+        self,
+        name: str,
+        target_field: Optional[str] = None,
+        min_length: int = 1,
+        max_length: int = 64,
+    ):
+        self._name: str = name
+        self._target_field: str = target_field or name
+        self._min_length: int = min_length
+        self._max_length: int = max_length
+
+    def name(self) -> str:
+        return self._name
+
+    def binding(self) -> Optional[Tuple[str, Conv]]:
+        return self._target_field, parse_string
+
+    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[Err]]:
+        err = _check_length(self._name, values[0], self._min_length, self._max_length)
+        if err:
+            return {}, err
+        return {self._target_field: {"$regex": f"^{re.escape(values[0])}"}}, None
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(name={self._name!r}, "
+            f"target_field={self._target_field}, min_length={self._min_length}, "
+            f"max_length={self._max_length})"
+        )
+
+
+class ParamPrefixCi(Param):
+    """
+    Case-insensitive prefix match expressed as a range query.
+    Regular expressions can't use collations, ranges can:
+    the query must run with a case-insensitive collation
+    (e.g. `CASE_INSENSITIVE_COLLATION`, see `pymongo_find`)
+    matching the one of the index on the target field.
+    """
+
+    __slots__ = ("_name", "_target_field", "_min_length", "_max_length")
+
+    def __init__(
+        self,
+        name: str,
+        target_field: Optional[str] = None,
+        min_length: int = 1,
+        max_length: int = 64,
+    ):
+        self._name: str = name
+        self._target_field: str = target_field or name
+        self._min_length: int = min_length
+        self._max_length: int = max_length
+
+    def name(self) -> str:
+        return self._name
+
+    def binding(self) -> Optional[Tuple[str, Conv]]:
+        return self._target_field, parse_string
+
+    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[Err]]:
+        err = _check_length(self._name, values[0], self._min_length, self._max_length)
+        if err:
+            return {}, err
+        # U+FFFF has the greatest primary weight in the root collation
+        return {
+            self._target_field: {"$gte": values[0], "$lt": f"{values[0]}\uffff"}
+        }, None
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(name={self._name!r}, "
+            f"target_field={self._target_field}, min_length={self._min_length}, "
+            f"max_length={self._max_length})"
+        )
+
+
+class ParamText(Param):
+    """
+    Full text search over the text index of the collection.
+    Use `sorting_option` to let clients order the results by relevance.
+    """
+
+    __slots__ = ("_name", "_min_length", "_max_length", "_max_terms", "_language")
+
+    def __init__(
+        self,
+        name: str,
+        min_length: int = 1,
+        max_length: int = 128,
+        max_terms: int = 8,
+        language: Optional[str] = None,
+    ):
+        self._name: str = name
+        self._min_length: int = min_length
+        self._max_length: int = max_length
+        self._max_terms: int = max_terms
+        self._language: Optional[str] = language
+
+    def name(self) -> str:
+        return self._name
+
+    def filter_from(self, values: List[str]) -> Tuple[Dict[str, Any], Optional[Err]]:
+        value = values[0]
+        err = _check_length(self._name, value, self._min_length, self._max_length)
+        if err:
+            return {}, err
+        if len(value.split()) > self._max_terms:
+            return {}, ParamError(
+                TOO_LONG,
+                self._name,
+                value,
+                str(self._max_terms),
+                fmt="Error while parsing {param!r} param. "
+                "Value must contain at most {detail} terms",
+            )
+        search: Dict[str, Any] = {"$search": value}
+        if self._language is not None:
+            search["$language"] = self._language
+        return {"$text": search}, None
+
+    @staticmethod
+    def sorting_option(name: str = "relevance") -> SortingOption:
+        """
+        :param name: the value of the sorting query param
+        :return: sorting option ordering by text score
+        """
+        return text_score_option(name)
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(name={self._name!r}, "
+            f"min_length={self._min_length}, max_length={self._max_length}, "
+            f"max_terms={self._max_terms}, language={self._language!r})"
+        )
@@ -0,0 +1,305 @@
+import asyncio
+import inspect
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from monquery.db import pymongo_cursor, pymongo_query
+from monquery.errors import Err
+from monquery.fltr import Filter
+from monquery.paginate import Pagination
+from monquery.query import Query
+from monquery.sort import Sorting
+
+
+class LatencyTracker:
+    """
+    Keeps recent query latencies to derive the hedging delay from
+    """
+
+    __slots__ = ("_samples", "_percentile", "_min_samples", "_default", "_lock")
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        window: int = 1000,
+        min_samples: int = 20,
+        default: float = 0.1,
+    ):
+        """
+        :param percentile: latency percentile to hedge after, between 0 and 1
+        :param window: number of recent latencies to keep
+        :param min_samples: number of latencies needed before the percentile is used
+        :param default: delay in seconds used until there are enough latencies
+        """
+        if not 0 < percentile <= 1:
+            raise ValueError(f"percentile must be in (0, 1], got {percentile!r}")
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._percentile: float = percentile
+        self._min_samples: int = min_samples
+        self._default: float = default
+        self._lock: threading.Lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def delay(self) -> float:
+        """
+        :return: seconds to wait for the first query before hedging
+        """
+        with self._lock:
+            if len(self._samples) < self._min_samples:
+                return self._default
+            samples = sorted(self._samples)
+        return samples[int(self._percentile * (len(samples) - 1))]
+
+
+class HedgeStats:
+    """
+    Counters of a hedged reader
+    """
+
+    __slots__ = ("queries", "hedged", "hedge_wins", "_lock")
+
+    def __init__(self) -> None:
+        self.queries: int = 0
+        self.hedged: int = 0
+        self.hedge_wins: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def record(self, hedged: bool, hedge_won: bool) -> None:
+        with self._lock:
+            self.queries += 1
+            self.hedged += hedged
+            self.hedge_wins += hedge_won
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "queries": self.queries,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.as_dict()!r})"
+
+
+class _Hedged:
+    def __init__(
+        self,
+        read_preference: Any = None,
+        tracker: Optional[LatencyTracker] = None,
+        max_delay: Optional[float] = None,
+        max_time_ms: Optional[int] = None,
+    ):
+        """
+        :param read_preference: read preference of the hedging query.
+            By default `Secondary()` for collections read from the primary
+            (`Primary()` or `PrimaryPreferred()`) and `Primary()` otherwise,
+            so that the hedging query goes to another member
+        :param tracker: latency tracker deciding when to hedge,
+            hedges after the 95th percentile latency by default
+        :param max_delay: upper bound of the hedging delay in seconds
+        :param max_time_ms: server-side time limit of both queries,
+            bounding the query which lost the race
+        """
+        self._read_preference: Any = read_preference
+        self.tracker: LatencyTracker = tracker or LatencyTracker()
+        self._max_delay: Optional[float] = max_delay
+        self._max_time_ms: Optional[int] = max_time_ms
+        self.stats: HedgeStats = HedgeStats()
+
+    def _delay(self) -> float:
+        delay = self.tracker.delay()
+        return delay if self._max_delay is None else min(delay, self._max_delay)
+
+    def _cursor(self, collection, q: Query):
+        cursor = pymongo_cursor(collection, q)
+        if self._max_time_ms is not None:
+            cursor = cursor.max_time_ms(self._max_time_ms)
+        return cursor
+
+    def _hedge_collection(self, collection):
+        read_preference = self._read_preference
+        if read_preference is None:
+            read_preference = _other_member(
+                getattr(collection, "read_preference", None)
+            )
+        return collection.with_options(read_preference=read_preference)
+
+
+def _other_member(read_preference: Any) -> Any:
+    from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary
+
+    if read_preference is None or isinstance(
+        read_preference, (Primary, PrimaryPreferred)
+    ):
+        return Secondary()
+    return Primary()
+
+
+class HedgedReader(_Hedged):
+    """
+    Runs queries and, if the first query hasn't returned within
+    the delay, the same query against another replica set member
+    (selected by a different read preference). The first response wins
+    and the cursor of the other query is closed. Closing only kills
+    the query on the server once it has returned its first batch,
+    before that the query runs until it completes, so bound both queries
+    with `max_time_ms`.
+
+    Hedging doubles the load of slow queries, only use it for
+    idempotent, cheap enough reads.
+    """
+
+    def __init__(
+        self,
+        read_preference: Any = None,
+        tracker: Optional[LatencyTracker] = None,
+        max_delay: Optional[float] = None,
+        max_time_ms: Optional[int] = None,
+        max_workers: int = 16,
+    ):
+        """
+        :param max_workers: max number of queries running at once
+        """
+        super().__init__(read_preference, tracker, max_delay, max_time_ms)
+        self._pool: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix="monquery-hedge"
+        )
+
+    def find(
+        self,
+        collection,
+        fltr: Filter,
+        sorting: Sorting,
+        pg: Pagination,
+        query: Dict[str, List[str]],
+        projection: Optional[Dict[str, Any]] = None,
+        collation: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[List[Any]], Optional[Err]]:
+        """
+        Same as `pymongo_find`, but returns a list of documents
+        """
+        q, err = pymongo_query(
+            fltr, sorting, pg, query, projection, collation=collation
+        )
+        if q is None:
+            return None, err
+        return self.execute(collection, q), None
+
+    def execute(self, collection, q: Query) -> List[Any]:
+        cursor = self._cursor(collection, q)
+        primary = self._submit(cursor)
+        done, _ = wait([primary], timeout=self._delay())
+        if done:
+            self.stats.record(False, False)
+            return primary.result()
+        hedge_cursor = self._cursor(self._hedge_collection(collection), q)
+        hedge = self._submit(hedge_cursor)
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((f for f in done if f.exception() is None), None)
+            if winner is not None or not pending:
+                break
+        loser_cursor = cursor if winner is hedge else hedge_cursor
+        if pending:
+            loser_cursor.close()
+        self.stats.record(True, winner is hedge)
+        if winner is None:
+            return primary.result()
+        return winner.result()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+    def _submit(self, cursor) -> "Future[List[Any]]":
+        started = time.monotonic()
+        fut = self._pool.submit(list, cursor)
+        fut.add_done_callback(lambda f: self._record(f, started))
+        return fut
+
+    def _record(self, fut: "Future[List[Any]]", started: float) -> None:
+        if not fut.cancelled() and fut.exception() is None:
+            self.tracker.record(time.monotonic() - started)
+
+
+class HedgedReaderAsync(_Hedged):
+    """
+    Hedged reads (asyncio version for motor), see `HedgedReader`
+    """
+
+    async def find(
+        self,
+        collection,
+        fltr: Filter,
+        sorting: Sorting,
+        pg: Pagination,
+        query: Dict[str, List[str]],
+        projection: Optional[Dict[str, Any]] = None,
+        collation: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[List[Any]], Optional[Err]]:
+        """
+        Same as `pymongo_find`, but returns a list of documents
+        """
+        q, err = pymongo_query(
+            fltr, sorting, pg, query, projection, collation=collation
+        )
+        if q is None:
+            return None, err
+        return await self.execute(collection, q), None
+
+    async def execute(self, collection, q: Query) -> List[Any]:
+        cursor = self._cursor(collection, q)
+        primary = self._start(cursor)
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self._delay())
+        except BaseException:
+            primary.cancel()
+            raise
+        if done:
+            self.stats.record(False, False)
+            return primary.result()
+        hedge_cursor = self._cursor(self._hedge_collection(collection), q)
+        hedge = self._start(hedge_cursor)
+        pending = {primary, hedge}
+        try:
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winner = next((t for t in done if t.exception() is None), None)
+                if winner is not None or not pending:
+                    break
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+        for task in pending:
+            task.cancel()
+            await _close(cursor if task is primary else hedge_cursor)
+        self.stats.record(True, winner is hedge)
+        if winner is None:
+            return primary.result()
+        return winner.result()
+
+    def _start(self, cursor) -> "asyncio.Task[List[Any]]":
+        started = time.monotonic()
+        task = asyncio.ensure_future(cursor.to_list(length=None))
+        task.add_done_callback(lambda t: self._record(t, started))
+        return task
+
+    def _record(self, task: "asyncio.Task[List[Any]]", started: float) -> None:
+        if not task.cancelled() and task.exception() is None:
+            self.tracker.record(time.monotonic() - started)
+
+
+async def _close(cursor) -> None:
+    # motor cursors return an awaitable, pymongo ones close right away
+    result = cursor.close()
+    if inspect.isawaitable(result):
+        await result
@@ -1,48 +1,81 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Optional, Tuple, Dict, List
+from typing import NamedTuple, Optional, Tuple, Dict, List
 
+from monquery.errors import Err, ErrorList, ParamError, NOT_INTEGER
 from monquery.util import get_one
 
 
-@dataclass(frozen=True)
-class Pg:
+class Pg(NamedTuple):
     skip: Optional[int] = None
     limit: Optional[int] = None
 
 
+_NO_PG = Pg()
+_NO_PG_OK: Tuple[Pg, None] = (_NO_PG, None)
+_NO_INT_OK: Tuple[None, None] = (None, None)
+
+
 class Pagination(ABC):
     """
     A general interface to define a pagination parser
     """
 
+    __slots__ = ()
+
     @abstractmethod
-    def from_query(self, q: Dict[str, List[str]]) -> Tuple[Pg, Optional[str]]:
+    def from_query(self, q: Dict[str, List[str]]) -> Tuple[Pg, Optional[Err]]:
         """
         :param q: a parsed query string
         :return: a paginator object and error
         """
         pass
 
+    def from_query_all(self, q: Dict[str, List[str]]) -> Tuple[Pg, Optional[Err]]:
+        """
+        Same as `from_query`, but reports every error found,
+        used by the "collect all" mode of `pymongo_find`.
+        Paginations which can't collect errors report the first one.
+        """
+        return self.from_query(q)
+
 
 class PaginationBasic(Pagination):
+    __slots__ = ("_default_limit", "_skip", "_limit", "_default", "_collect_all")
+
     def __init__(
         self,
         default_limit: Optional[int] = None,
         skip_name: str = "skip",
         limit_name: str = "limit",
+        collect_all: bool = False,
     ):
+        """
+        :param collect_all: validate both skip and limit and return
+            every error found as `ErrorList`
+        """
         self._default_limit: Optional[int] = default_limit
+        self._collect_all: bool = collect_all
         self._skip: str = skip_name
         self._limit: str = limit_name
+        self._default: Tuple[Pg, None] = (Pg(limit=default_limit), None)
+
+    def from_query(self, q: Dict[str, List[str]]) -> Tuple[Pg, Optional[Err]]:
+        return self._from_query(q, self._collect_all)
+
+    def from_query_all(self, q: Dict[str, List[str]]) -> Tuple[Pg, Optional[Err]]:
+        return self._from_query(q, True)
 
-    def from_query(self, q: Dict[str, List[str]]) -> Tuple[Pg, Optional[str]]:
+    def _from_query(
+        self, q: Dict[str, List[str]], collect_all: bool
+    ) -> Tuple[Pg, Optional[Err]]:
         skip, err = self._to_int(self._skip, q)
-        if err:
-            return Pg(), err
-        limit, err = self._to_int(self._limit, q)
-        if err:
-            return Pg(), err
+        if err and not collect_all:
+            return _NO_PG, err
+        limit, limit_err = self._to_int(self._limit, q)
+        if err or limit_err:
+            return _NO_PG, (ErrorList.of(err, limit_err) if collect_all else limit_err)
+        if skip is None and limit is None:
+            return self._default
         return (
             Pg(
                 skip=skip,
@@ -54,16 +87,16 @@ class PaginationBasic(Pagination):
     @staticmethod
     def _to_int(
         key: str, q: Dict[str, List[str]]
-    ) -> Tuple[Optional[int], Optional[str]]:
+    ) -> Tuple[Optional[int], Optional[Err]]:
         val = get_one(q, key)
         if val is None:
-            return None, None
+            return _NO_INT_OK
         try:
             return int(val), None
         except ValueError:
-            return None, f"value of {key!r} must be integer"
+            return None, ParamError(NOT_INTEGER, key, val)
 
 
 class PaginationDummy(Pagination):
-    def from_query(self, q: Dict[str, List[str]]) -> Tuple[Pg, Optional[str]]:
-        return Pg(), None
+    def from_query(self, q: Dict[str, List[str]]) -> Tuple[Pg, Optional[Err]]:
+        return _NO_PG_OK
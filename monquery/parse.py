@@ -1,12 +1,27 @@
-from datetime import datetime
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Tuple, Optional, Callable, TypeVar
 
 
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+_NONE_OK = (None, None)
+_TRUE_OK = (True, None)
+_FALSE_OK = (False, None)
+
+_RFC3339 = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[Tt ](\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,9}))?"
+    r"(?:([Zz])|([+-])(\d{2}):(\d{2}))"
+)
+
+
 def parse_datetime_iso(s: str) -> Tuple[datetime, Optional[str]]:
     try:
         return datetime.fromisoformat(s), None
     except ValueError as e:
-        return datetime.utcfromtimestamp(0), e.args[0]
+        return _EPOCH, e.args[0]
 
 
 def parse_int(s: str) -> Tuple[int, Optional[str]]:
@@ -31,7 +46,70 @@ def parse_datetime_utc_timestamp(s: str) -> Tuple[datetime, Optional[str]]:
     try:
         return datetime.utcfromtimestamp(float(s)), None
     except ValueError as e:
-        return datetime.utcfromtimestamp(0), e.args[0]
+        return _EPOCH, e.args[0]
+    except (OverflowError, OSError):
+        return _EPOCH, f"Timestamp out of range: {s!r}"
+
+
+def parse_datetime_rfc3339(s: str) -> Tuple[datetime, Optional[str]]:
+    """
+    Parses RFC 3339 datetime strings like `2022-05-06T20:35:14.99Z`
+    or `2022-05-06T23:35:14+03:00`. The offset is mandatory.
+
+    :return: timezone-aware datetime and error
+    """
+    m = _RFC3339.fullmatch(s)
+    if m is None:
+        return _EPOCH_UTC, f"Invalid RFC 3339 datetime: {s!r}"
+    if m.group(7) is None or len(m.group(7)) in (3, 6):
+        # the subset `datetime.fromisoformat` understands on every supported Python
+        try:
+            return (
+                datetime.fromisoformat(
+                    f"{s[:10]}T{s[11:-1]}+00:00" if m.group(8) else f"{s[:10]}T{s[11:]}"
+                ),
+                None,
+            )
+        except ValueError as e:
+            return _EPOCH_UTC, e.args[0]
+    year, month, day, hour, minute, second, frac, z, sign, tzh, tzm = m.groups()
+    try:
+        return (
+            datetime(
+                int(year),
+                int(month),
+                int(day),
+                int(hour),
+                int(minute),
+                int(second),
+                int(frac[:6].ljust(6, "0")),
+                timezone.utc if z else _offset(sign, tzh, tzm),
+            ),
+            None,
+        )
+    except ValueError as e:
+        return _EPOCH_UTC, e.args[0]
+
+
+def parse_epoch_millis(s: str) -> Tuple[datetime, Optional[str]]:
+    """
+    Parses integer milliseconds since the Unix epoch.
+
+    :return: timezone-aware UTC datetime and error
+    """
+    digits = s[1:] if s[:1] == "-" else s
+    if not (digits.isascii() and digits.isdigit()):
+        return _EPOCH_UTC, f"Invalid epoch milliseconds: {s!r}"
+    try:
+        return _EPOCH_UTC + timedelta(0, 0, int(s) * 1000), None
+    except OverflowError:
+        return _EPOCH_UTC, f"Epoch milliseconds out of range: {s!r}"
+
+
+@lru_cache(maxsize=64)
+def _offset(sign: str, hours: str, minutes: str) -> timezone:
+    delta = timedelta(hours=int(hours), minutes=int(minutes))
+    return timezone(-delta if sign == "-" else delta)
 
 
 T = TypeVar("T")
@@ -42,11 +120,28 @@ def optional(
 ) -> Callable[[str], Tuple[Optional[T], Optional[str]]]:
     def _parse_optional(s: str) -> Tuple[Optional[T], Optional[str]]:
         if s == null_value:
-            return None, None
+            return _NONE_OK
         return f(s)
 
+    _parse_optional.__wrapped__ = f  # type: ignore
     return _parse_optional
 
 
+def memoized(
+    f: Callable[[str], Tuple[T, Optional[str]]], maxsize: int = 256
+) -> Callable[[str], Tuple[T, Optional[str]]]:
+    """
+    Wraps a converter with a bounded LRU cache.
+    Useful for params which mostly receive a small set of repeated values,
+    e.g. rounded timestamps of range filters.
+    The converter must be pure and return immutable values.
+
+    :param f: the converter to wrap
+    :param maxsize: max number of cached values
+    :return: caching converter
+    """
+    return lru_cache(maxsize=maxsize)(f)
+
+
 def parse_bool(s: str) -> Tuple[Optional[bool], Optional[str]]:
-    return s.lower() in ("true", "1"), None
+    return _TRUE_OK if s.lower() in ("true", "1") else _FALSE_OK
@@ -0,0 +1,292 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from monquery.db import pymongo_cursor, pymongo_query
+from monquery.errors import Err
+from monquery.fltr import Filter
+from monquery.paginate import Pagination, Pg
+from monquery.query import Query, collection_key
+from monquery.sort import Sorting
+
+
+class PrefetchStats:
+    """
+    Counters of a prefetcher
+    """
+
+    __slots__ = ("hits", "misses", "prefetched", "skipped", "errors", "_lock")
+
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+        self.prefetched: int = 0
+        self.skipped: int = 0
+        self.errors: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def incr(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    @property
+    def hit_rate(self) -> float:
+        served = self.hits + self.misses
+        return self.hits / served if served else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "prefetched": self.prefetched,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "hit_rate": self.hit_rate,
+        }
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.as_dict()!r})"
+
+
+def next_page(q: Query) -> Optional[Query]:
+    """
+    :param q: translated query
+    :return: the query of the page following the one of `q`,
+        `None` if the query is not paginated
+    """
+    limit = q.pg.limit
+    if not limit:
+        return None
+    return q._replace(pg=Pg(skip=(q.pg.skip or 0) + limit, limit=limit))
+
+
+class _Prefetcher:
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 30.0,
+        max_concurrency: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param max_entries: max number of prefetched pages kept,
+            the oldest ones are dropped when exceeded
+        :param ttl: seconds a prefetched page may be served for
+        :param max_concurrency: max number of prefetches running at once,
+            pages are not prefetched while it is reached
+        """
+        self._max_entries: int = max_entries
+        self._ttl: float = ttl
+        self._max_concurrency: int = max_concurrency
+        self._clock: Callable[[], float] = clock
+        self._cache: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+        self.stats: PrefetchStats = PrefetchStats()
+
+    def _take(self, key: Hashable) -> Any:
+        """
+        :return: the pending result stored for the key, `None` if there is none
+            or it has expired. A page is served once.
+        """
+        with self._lock:
+            entry = self._cache.pop(key, None)
+        if entry is None or entry[0] < self._clock():
+            return None
+        return entry[1]
+
+    def _store(self, key: Hashable, pending: Any) -> None:
+        now = self._clock()
+        with self._lock:
+            self._cache[key] = (now + self._ttl, pending)
+            while self._cache and (
+                len(self._cache) > self._max_entries
+                or next(iter(self._cache.values()))[0] < now
+            ):
+                self._cache.popitem(last=False)
+
+    def _contains(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._cache
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+class Prefetcher(_Prefetcher):
+    """
+    Serves paginated queries and fetches the next page in a background thread,
+    so that a client paging through the results sequentially
+    gets it without waiting for the database (skip-based pagination).
+
+    Results are materialized lists and prefetched pages may be slightly stale,
+    up to `ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 30.0,
+        max_concurrency: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(max_entries, ttl, max_concurrency, clock)
+        self._slots: threading.BoundedSemaphore = threading.BoundedSemaphore(
+            max_concurrency
+        )
+
+    def find(
+        self,
+        collection,
+        fltr: Filter,
+        sorting: Sorting,
+        pg: Pagination,
+        query: Dict[str, List[str]],
+        projection: Optional[Dict[str, Any]] = None,
+        collation: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[List[Any]], Optional[Err]]:
+        """
+        Same as `pymongo_find`, but returns a list of documents
+        """
+        q, err = pymongo_query(
+            fltr, sorting, pg, query, projection, collation=collation
+        )
+        if q is None:
+            return None, err
+        return self.execute(collection, q), None
+
+    def execute(self, collection, q: Query) -> List[Any]:
+        key = (collection_key(collection), q.key())
+        fut: "Optional[Future[List[Any]]]" = self._take(key)
+        docs: Optional[List[Any]] = None
+        if fut is not None:
+            try:
+                docs = fut.result()
+            except Exception:
+                docs = None
+        if docs is None:
+            self.stats.incr("misses")
+            docs = list(pymongo_cursor(collection, q))
+        else:
+            self.stats.incr("hits")
+        if q.pg.limit and len(docs) == q.pg.limit:
+            self.prefetch(collection, q)
+        return docs
+
+    def prefetch(self, collection, q: Query) -> bool:
+        """
+        Starts fetching the page following the one of `q`.
+
+        :return: whether the prefetch has been started
+        """
+        nxt = next_page(q)
+        if nxt is None:
+            return False
+        key = (collection_key(collection), nxt.key())
+        if self._contains(key):
+            return False
+        if not self._slots.acquire(blocking=False):
+            self.stats.incr("skipped")
+            return False
+        fut: "Future[List[Any]]" = Future()
+        self._store(key, fut)
+        self.stats.incr("prefetched")
+        threading.Thread(
+            target=self._run, args=(collection, nxt, fut), daemon=True
+        ).start()
+        return True
+
+    def _run(self, collection, q: Query, fut: "Future[List[Any]]") -> None:
+        try:
+            fut.set_result(list(pymongo_cursor(collection, q)))
+        except Exception as e:
+            self.stats.incr("errors")
+            fut.set_exception(e)
+        finally:
+            self._slots.release()
+
+
+class PrefetcherAsync(_Prefetcher):
+    """
+    Serves paginated queries and fetches the next page in a background task
+    (asyncio version for motor). Must be used within a single event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 30.0,
+        max_concurrency: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(max_entries, ttl, max_concurrency, clock)
+        self._running: int = 0
+
+    async def find(
+        self,
+        collection,
+        fltr: Filter,
+        sorting: Sorting,
+        pg: Pagination,
+        query: Dict[str, List[str]],
+        projection: Optional[Dict[str, Any]] = None,
+        collation: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[List[Any]], Optional[Err]]:
+        """
+        Same as `pymongo_find`, but returns a list of documents
+        """
+        q, err = pymongo_query(
+            fltr, sorting, pg, query, projection, collation=collation
+        )
+        if q is None:
+            return None, err
+        return await self.execute(collection, q), None
+
+    async def execute(self, collection, q: Query) -> List[Any]:
+        key = (collection_key(collection), q.key())
+        task: "Optional[asyncio.Task[List[Any]]]" = self._take(key)
+        docs: Optional[List[Any]] = None
+        if task is not None:
+            try:
+                docs = await asyncio.shield(task)
+            except Exception:
+                docs = None
+        if docs is None:
+            self.stats.incr("misses")
+            docs = await pymongo_cursor(collection, q).to_list(length=None)
+        else:
+            self.stats.incr("hits")
+        if q.pg.limit and len(docs) == q.pg.limit:
+            self.prefetch(collection, q)
+        return docs
+
+    def prefetch(self, collection, q: Query) -> bool:
+        """
+        Starts fetching the page following the one of `q`.
+
+        :return: whether the prefetch has been started
+        """
+        nxt = next_page(q)
+        if nxt is None:
+            return False
+        key = (collection_key(collection), nxt.key())
+        if self._contains(key):
+            return False
+        if self._running >= self._max_concurrency:
+            self.stats.incr("skipped")
+            return False
+        self._running += 1
+        task = asyncio.ensure_future(
+            pymongo_cursor(collection, nxt).to_list(length=None)
+        )
+        task.add_done_callback(self._done)
+        self._store(key, task)
+        self.stats.incr("prefetched")
+        return True
+
+    def _done(self, task: "asyncio.Task[List[Any]]") -> None:
+        self._running -= 1
+        if not task.cancelled() and task.exception() is not None:
+            self.stats.incr("errors")
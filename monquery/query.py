@@ -0,0 +1,94 @@
+from typing import Any, Dict, Hashable, NamedTuple, Optional
+
+from monquery.paginate import Pg
+from monquery.sort import SortingOption
+
+
+class Query(NamedTuple):
+    """
+    A query string translated into MongoDB find arguments
+    """
+
+    filter: Dict[str, Any]
+    sort: Optional[SortingOption] = None
+    pg: Pg = Pg()
+    projection: Optional[Dict[str, Any]] = None
+    collation: Optional[Dict[str, Any]] = None
+
+    def key(self) -> Hashable:
+        """
+        :return: a hashable representation of the query,
+            equal for queries producing the same results
+        """
+        return (
+            _freeze_top(self.filter),
+            freeze(self.sort),
+            freeze(self.pg),
+            _freeze_top(self.projection),
+            freeze(self.collation),
+        )
+
+
+def freeze(value: Any) -> Hashable:
+    """
+    :param value: a filter, projection or any other BSON-like value
+    :return: hashable representation of the value. Key order of dicts is kept,
+        as it is significant for embedded documents, and scalars are tagged
+        with their type, as e.g. `True == 1` but they match different documents.
+    """
+    if isinstance(value, dict):
+        return dict, tuple((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return list, tuple(freeze(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return type(value).__name__, repr(value)
+    return type(value).__name__, value
+
+
+_LOGICAL_OPERATORS = frozenset({"$and", "$or", "$nor"})
+
+
+def _freeze_top(doc: Optional[Dict[str, Any]]) -> Hashable:
+    # the order of top-level filter and projection fields doesn't matter,
+    # and neither does the order of the clauses of logical operators
+    if doc is None:
+        return None
+    return dict, tuple(sorted((k, _freeze_field(k, v)) for k, v in doc.items()))
+
+
+def _freeze_field(key: str, value: Any) -> Hashable:
+    if key in _LOGICAL_OPERATORS and isinstance(value, list):
+        clauses = (_freeze_top(c) if isinstance(c, dict) else freeze(c) for c in value)
+        return list, tuple(sorted(clauses, key=repr))
+    return freeze(value)
+
+
+def uses_text(value: Any) -> bool:
+    """
+    :param value: a filter
+    :return: whether the filter contains a `$text` search
+    """
+    if isinstance(value, dict):
+        return "$text" in value or any(uses_text(v) for v in value.values())
+    if isinstance(value, list):
+        return any(uses_text(v) for v in value)
+    return False
+
+
+def collection_key(collection) -> Hashable:
+    """
+    :param collection: a pymongo (or motor) collection
+    :return: a hashable identifying the collection of a particular client
+        with particular options affecting the results
+    """
+    database = getattr(collection, "database", None)
+    if database is None:
+        return id(collection)
+    return (
+        collection.full_name,
+        id(database.client),
+        repr(collection.codec_options),
+        repr(collection.read_preference),
+    )
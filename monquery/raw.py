@@ -0,0 +1,173 @@
+import json
+import struct
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from bson import decode
+from bson.codec_options import CodecOptions, DEFAULT_CODEC_OPTIONS
+from bson.raw_bson import RawBSONDocument
+
+
+RawDoc = Union[RawBSONDocument, bytes]
+
+_INT32 = struct.Struct("<i")
+_FIXED_SIZES = {
+    0x01: 8,  # double
+    0x06: 0,  # undefined
+    0x07: 12,  # ObjectId
+    0x08: 1,  # bool
+    0x09: 8,  # UTC datetime
+    0x0A: 0,  # null
+    0x10: 4,  # int32
+    0x11: 8,  # timestamp
+    0x12: 8,  # int64
+    0x13: 16,  # decimal128
+    0x7F: 0,  # max key
+    0xFF: 0,  # min key
+}
+
+
+def raw_collection(collection):
+    """
+    :param collection: a pymongo (or motor) collection
+    :return: the same collection returning documents as `RawBSONDocument`
+    """
+    return collection.with_options(
+        codec_options=collection.codec_options.with_options(
+            document_class=RawBSONDocument
+        )
+    )
+
+
+class RawFields:
+    """
+    Lazy read-only access to the top-level fields of a raw BSON document.
+    Only the requested elements are decoded, the rest are skipped over.
+    """
+
+    __slots__ = ("_data", "_codec_options")
+
+    def __init__(
+        self, doc: RawDoc, codec_options: CodecOptions = DEFAULT_CODEC_OPTIONS
+    ):
+        self._data: bytes = _raw_bytes(doc)
+        self._codec_options: CodecOptions = codec_options
+
+    def get(self, name: str, default: Any = None) -> Any:
+        key = name.encode()
+        for el_name, start, end in _elements(self._data):
+            if el_name == key:
+                return decode(
+                    _document_of([self._data[start:end]]), self._codec_options
+                )[name]
+        return default
+
+    def __getitem__(self, name: str) -> Any:
+        missing = object()
+        value = self.get(name, missing)
+        if value is missing:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name: str) -> bool:
+        key = name.encode()
+        return any(el_name == key for el_name, _, _ in _elements(self._data))
+
+    def project(self, fields: Iterable[str]) -> dict:
+        """
+        :param fields: top-level field names to decode
+        :return: a dict holding only the requested fields which are present
+        """
+        return decode(project_raw(self._data, fields), self._codec_options)
+
+
+def project_raw(doc: RawDoc, fields: Iterable[str]) -> bytes:
+    """
+    :param doc: a raw BSON document
+    :param fields: top-level field names to keep
+    :return: a raw BSON document containing only the requested fields
+    """
+    data = _raw_bytes(doc)
+    keys = {f.encode() for f in fields}
+    return _document_of(
+        [data[start:end] for name, start, end in _elements(data) if name in keys]
+    )
+
+
+def raw_to_json(
+    doc: RawDoc,
+    fields: Sequence[str],
+    codec_options: CodecOptions = DEFAULT_CODEC_OPTIONS,
+) -> bytes:
+    """
+    Serializes the given fields of a raw BSON document to JSON.
+    Only these fields are decoded (the others are skipped over),
+    then they are encoded with `json`.
+
+    :param doc: a raw BSON document
+    :param fields: top-level field names to serialize, in output order
+    :return: JSON object bytes
+    """
+    values = decode(project_raw(doc, fields), codec_options)
+    return json.dumps(
+        {f: values[f] for f in fields if f in values},
+        default=_json_default,
+        separators=(",", ":"),
+    ).encode()
+
+
+def raw_list_to_json(
+    docs: Iterable[RawDoc],
+    fields: Sequence[str],
+    codec_options: CodecOptions = DEFAULT_CODEC_OPTIONS,
+) -> bytes:
+    """
+    :param docs: raw BSON documents, e.g. a cursor of a `raw_collection`
+    :param fields: top-level field names to serialize, in output order
+    :return: JSON array bytes
+    """
+    return b"[" + b",".join(raw_to_json(d, fields, codec_options) for d in docs) + b"]"
+
+
+def _json_default(o: Any) -> Any:
+    if isinstance(o, datetime):
+        return o.isoformat()
+    return str(o)
+
+
+def _raw_bytes(doc: RawDoc) -> bytes:
+    # `raw` is a memoryview for documents decoded from a raw batch
+    return bytes(doc.raw) if isinstance(doc, RawBSONDocument) else doc
+
+
+def _document_of(elements: List[bytes]) -> bytes:
+    body = b"".join(elements)
+    return _INT32.pack(len(body) + 5) + body + b"\x00"
+
+
+def _elements(data: bytes) -> Iterator[Tuple[bytes, int, int]]:
+    pos = 4
+    end = len(data) - 1
+    while pos < end:
+        start = pos
+        typ = data[pos]
+        name_end = data.index(b"\x00", pos + 1)
+        pos = name_end + 1 + _value_size(data, typ, name_end + 1)
+        yield data[start + 1 : name_end], start, pos
+
+
+def _value_size(data: bytes, typ: int, pos: int) -> int:
+    size: Optional[int] = _FIXED_SIZES.get(typ)
+    if size is not None:
+        return size
+    if typ in (0x02, 0x0D, 0x0E):  # string, JS code, symbol
+        return 4 + _INT32.unpack_from(data, pos)[0]
+    if typ in (0x03, 0x04, 0x0F):  # document, array, code with scope
+        return _INT32.unpack_from(data, pos)[0]
+    if typ == 0x05:  # binary
+        return 5 + _INT32.unpack_from(data, pos)[0]
+    if typ == 0x0B:  # regex: two cstrings
+        return data.index(b"\x00", data.index(b"\x00", pos) + 1) + 1 - pos
+    if typ == 0x0C:  # DBPointer
+        return 16 + _INT32.unpack_from(data, pos)[0]
+    raise ValueError(f"Unsupported BSON element type: {typ:#04x}")
@@ -0,0 +1,205 @@
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+
+from monquery.fltr import Conv, FilterSimple, Param, params_basic
+from monquery.parse import (
+    parse_bool,
+    parse_datetime_iso,
+    parse_datetime_rfc3339,
+    parse_datetime_utc_timestamp,
+    parse_epoch_millis,
+    parse_float,
+    parse_int,
+    parse_string,
+)
+
+NUMBER_TYPES = frozenset({"int", "long", "double", "decimal"})
+
+# numbers of any type compare and match index keys of any other numeric type
+CONVERTER_TYPES: Dict[Callable[..., Any], Set[str]] = {
+    parse_int: set(NUMBER_TYPES),
+    parse_float: set(NUMBER_TYPES),
+    parse_string: {"string"},
+    parse_bool: {"bool"},
+    parse_datetime_iso: {"date"},
+    parse_datetime_rfc3339: {"date"},
+    parse_datetime_utc_timestamp: {"date"},
+    parse_epoch_millis: {"date"},
+}
+
+_TYPE_CONVERTERS: Dict[str, Conv] = {
+    "int": parse_int,
+    "long": parse_int,
+    "double": parse_float,
+    "decimal": parse_float,
+    "string": parse_string,
+    "bool": parse_bool,
+    "date": parse_datetime_iso,
+}
+_IGNORED_TYPES = frozenset({"null", "missing"})
+
+
+class Mismatch(NamedTuple):
+    """
+    A param whose converter produces values of other BSON types than the stored ones
+    """
+
+    param: str
+    field: str
+    expected: Set[str]
+    stored: Set[str]
+
+    def __str__(self) -> str:
+        return (
+            f"Param {self.param!r} compares field {self.field!r} "
+            f"with {'/'.join(sorted(self.expected))} values, "
+            f"but it holds {'/'.join(sorted(self.stored))}"
+        )
+
+
+def converter_types(conv: Conv) -> Optional[Set[str]]:
+    """
+    :param conv: a converter, possibly wrapped with `optional` or `memoized`
+    :return: BSON type aliases of the converter output, `None` if unknown
+    """
+    f: Any = conv
+    while f not in CONVERTER_TYPES and hasattr(f, "__wrapped__"):
+        f = f.__wrapped__
+    return CONVERTER_TYPES.get(f)
+
+
+def sample_types(
+    collection, fields: Iterable[str], size: int = 100
+) -> Dict[str, Set[str]]:
+    """
+    Samples the collection for the BSON types of the given fields.
+
+    :param collection: a pymongo collection
+    :param fields: field paths to inspect
+    :param size: number of documents to sample
+    :return: BSON type aliases found for each field present in the sample
+    """
+    fields = list(fields)
+    types: Dict[str, Set[str]] = {f: set() for f in fields}
+    for doc in collection.aggregate(
+        [
+            {"$sample": {"size": size}},
+            {
+                "$project": {
+                    "_id": False,
+                    **{f"f{i}": {"$type": f"${f}"} for i, f in enumerate(fields)},
+                }
+            },
+        ]
+    ):
+        for i, f in enumerate(fields):
+            typ = doc.get(f"f{i}")
+            if typ is not None:
+                types[f].add(typ)
+    return {f: t - _IGNORED_TYPES for f, t in types.items() if t - _IGNORED_TYPES}
+
+
+def validator_types(collection) -> Dict[str, Set[str]]:
+    """
+    :param collection: a pymongo collection
+    :return: BSON types declared by the `$jsonSchema` validator of the collection
+        for each (possibly nested) property
+    """
+    for info in collection.database.list_collections(filter={"name": collection.name}):
+        schema = info.get("options", {}).get("validator", {}).get("$jsonSchema")
+        if schema:
+            types: Dict[str, Set[str]] = {}
+            _schema_types(schema, "", types)
+            return types
+    return {}
+
+
+def _schema_types(schema: Dict[str, Any], prefix: str, out: Dict[str, Set[str]]):
+    for name, prop in schema.get("properties", {}).items():
+        path = f"{prefix}{name}"
+        bson_type = prop.get("bsonType")
+        if bson_type is not None:
+            declared = {bson_type} if isinstance(bson_type, str) else set(bson_type)
+            if declared - _IGNORED_TYPES:
+                out[path] = declared - _IGNORED_TYPES
+        _schema_types(prop, f"{path}.", out)
+
+
+def stored_types(
+    collection, fields: Iterable[str], sample_size: int = 100
+) -> Dict[str, Set[str]]:
+    """
+    :return: BSON types of the fields declared by the collection validator
+        or, for the fields it doesn't declare, found by sampling
+    """
+    types = validator_types(collection)
+    missing = [f for f in fields if f not in types]
+    if missing:
+        types.update(sample_types(collection, missing, sample_size))
+    return types
+
+
+def check_params(params: Iterable[Param], types: Dict[str, Set[str]]) -> List[Mismatch]:
+    """
+    :param params: declared params
+    :param types: stored BSON types of the fields, see `stored_types`
+    :return: params whose converters don't match the stored types.
+        Params with unknown converters or fields are skipped.
+    """
+    mismatches = []
+    for param in params:
+        binding = param.binding()
+        if binding is None:
+            continue
+        field, conv = binding
+        expected = converter_types(conv)
+        stored = types.get(field)
+        if expected is None or not stored or stored & expected:
+            continue
+        mismatches.append(Mismatch(param.name(), field, expected, stored))
+    return mismatches
+
+
+def check_filter(
+    collection, fltr: FilterSimple, sample_size: int = 100
+) -> List[Mismatch]:
+    """
+    Checks the params of the filter against the data of the collection,
+    meant to be called at startup to report queries which can't match anything.
+
+    :return: params whose converters don't match the stored types
+    """
+    params = fltr.params()
+    fields = {b[0] for b in (p.binding() for p in params) if b is not None}
+    return check_params(params, stored_types(collection, sorted(fields), sample_size))
+
+
+def converter_for(types: Set[str]) -> Conv:
+    """
+    :param types: stored BSON types of a field
+    :return: a converter producing values of these types
+    :raises ValueError: if there is no single suitable converter
+    """
+    convs = {_TYPE_CONVERTERS.get(t) for t in types - _IGNORED_TYPES}
+    if convs == {parse_int, parse_float}:
+        return parse_float
+    if len(convs) != 1 or None in convs:
+        raise ValueError(f"No converter for BSON types: {sorted(types)!r}")
+    return convs.pop()  # type: ignore
+
+
+def params_for_schema(
+    types: Dict[str, Set[str]],
+    base_name: str,
+    field: Optional[str] = None,
+    **kwargs: Any,
+) -> List[Param]:
+    """
+    Same as `params_basic`, but with the converter matching the stored type of the field.
+
+    :param types: stored BSON types of the fields, see `stored_types`
+    :raises ValueError: if the field type is unknown or has no suitable converter
+    """
+    field = field or base_name
+    if field not in types:
+        raise ValueError(f"Unknown type of field {field!r}")
+    return params_basic(base_name, converter_for(types[field]), field=field, **kwargs)
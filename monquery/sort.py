@@ -1,14 +1,24 @@
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 
+from monquery.errors import Err, ParamError, UNEXPECTED_SORTING_KEY
 from monquery.util import get_one
 
 
-@dataclass(frozen=True)
-class SortingOption:
+TEXT_SCORE: Dict[str, str] = {"$meta": "textScore"}
+
+
+class SortingOption(NamedTuple):
     name: str
     field: Optional[str] = None
-    direction: int = 1
+    direction: Union[int, Dict[str, str]] = 1
+
+
+def text_score_option(name: str = "relevance", field: str = "score") -> SortingOption:
+    """
+    A sorting option ordering the results of a `$text` search (see `ParamText`)
+    by relevance. Only valid when the filter includes a `$text` query.
+    """
+    return SortingOption(name, field=field, direction=TEXT_SCORE)
 
 
 class Sorting:
@@ -16,22 +26,33 @@ class Sorting:
     A general interface to define a pagination parser
     """
 
+    __slots__ = ("_options", "_key", "_default")
+
     def __init__(
         self,
         options: List[SortingOption],
         key: str = "sort",
         default: Optional[SortingOption] = None,
     ):
-        self._options = {s.name: s for s in options}
+        self._options: Dict[str, Tuple[SortingOption, None]] = {
+            s.name: (s, None) for s in options
+        }
         self._key: str = key
-        self._default: Optional[SortingOption] = default
+        self._default: Tuple[Optional[SortingOption], None] = (default, None)
+
+    def key(self) -> str:
+        """
+        :return: name of the sorting query param
+        """
+        return self._key
 
     def from_query(
         self, q: Dict[str, List[str]]
-    ) -> Tuple[Optional[SortingOption], Optional[str]]:
+    ) -> Tuple[Optional[SortingOption], Optional[Err]]:
         sort_key = get_one(q, self._key)
         if sort_key is None:
-            return self._default, None
-        if sort_key in self._options:
-            return self._options[sort_key], None
-        return None, f"unexpected sorting key: {sort_key!r}"
+            return self._default
+        found = self._options.get(sort_key)
+        if found is not None:
+            return found
+        return None, ParamError(UNEXPECTED_SORTING_KEY, self._key, sort_key)
@@ -1,6 +1,12 @@
+import asyncio
+import threading
+import time
 from datetime import datetime
 
+import bson
 import pytest
+from bson.codec_options import DEFAULT_CODEC_OPTIONS
+from bson.raw_bson import RawBSONDocument
 from pymongo import MongoClient
 
 
@@ -30,3 +36,109 @@ def coll():
     )
     yield coll
     coll.delete_many({})
+
+
+class FakeCursor:
+    def __init__(self, collection, docs):
+        self._collection = collection
+        self._docs = list(docs)
+        self.sort_spec = None
+        self.max_time = None
+        self.closed = False
+
+    def sort(self, spec):
+        self.sort_spec = spec
+        return self
+
+    def skip(self, n):
+        self._docs = self._docs[n:]
+        return self
+
+    def limit(self, n):
+        if n:
+            self._docs = self._docs[:n]
+        return self
+
+    def max_time_ms(self, ms):
+        self.max_time = ms
+        return self
+
+    def close(self):
+        self.closed = True
+
+    def __iter__(self):
+        self._collection.wait()
+        if self._collection.error is not None:
+            raise self._collection.error
+        return iter(self._docs)
+
+    async def to_list(self, length=None):
+        await self._collection.async_wait()
+        if self._collection.error is not None:
+            raise self._collection.error
+        return list(self._docs)
+
+
+class FakeCollection:
+    """
+    An in-memory stand-in for a pymongo/motor collection.
+    Records the calls, returns all the documents regardless of the filter.
+    """
+
+    def __init__(self, docs, name="fake", delay=0.0, error=None):
+        self.docs = list(docs)
+        self.name = name
+        self.full_name = f"test.{name}"
+        self.delay = delay
+        self.error = error
+        self.gate = threading.Event()
+        self.gate.set()
+        self.calls = []
+        self.cursors = []
+        self.options = {}
+        self.clones = []
+        self.codec_options = DEFAULT_CODEC_OPTIONS
+
+    def with_options(self, **options):
+        clone = FakeCollection(self.docs, self.name, self.delay, self.error)
+        clone.options = options
+        clone.codec_options = options.get("codec_options", self.codec_options)
+        self.clones.append(clone)
+        return clone
+
+    def find(self, fltr, projection=None, **kwargs):
+        self.calls.append(("find", fltr, projection, kwargs))
+        docs = self.docs
+        if self.codec_options.document_class is RawBSONDocument:
+            docs = [RawBSONDocument(bson.encode(d)) for d in docs]
+        self.cursors.append(FakeCursor(self, docs))
+        return self.cursors[-1]
+
+    def aggregate(self, pipeline, **kwargs):
+        self.calls.append(("aggregate", pipeline, kwargs))
+        return FakeCursor(self, [{k: list(self.docs) for k in pipeline[-1]["$facet"]}])
+
+    def wait(self):
+        self.gate.wait()
+        time.sleep(self.delay)
+
+    async def async_wait(self):
+        while not self.gate.is_set():
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(self.delay)
+
+
+@pytest.fixture()
+def fake_coll():
+    return FakeCollection(
+        [
+            {"foo": 12345, "bar": "hello there"},
+            {"foo": -3445, "bar": "general kenobi"},
+            {"foo": 45, "bar": "whateverrr"},
+        ]
+    )
+
+
+@pytest.fixture()
+def make_coll():
+    return FakeCollection
@@ -0,0 +1,224 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import pytest
+
+from monquery import (
+    FilterSimple,
+    PaginationBasic,
+    ParamOf,
+    ParamText,
+    Sorting,
+    SortingOption,
+    params_basic,
+    parse_int,
+    parse_string,
+)
+from monquery.admission import (
+    AdmissionController,
+    AdmissionControllerAsync,
+    Rejected,
+    Shape,
+    ShapeLimit,
+    TokenBucket,
+    shape_of,
+)
+from monquery.db import pymongo_query
+
+BY_FOO = SortingOption("foo")
+FLTR = FilterSimple(
+    [
+        *params_basic("foo", parse_int, include_range_filters=True),
+        ParamText("q"),
+        ParamOf("kind", parse_string, {"a": {"kind": "a"}}),
+    ]
+)
+SORTING = Sorting([BY_FOO])
+PG = PaginationBasic()
+
+
+def _shape(query):
+    q, _ = pymongo_query(FLTR, SORTING, PG, parse_qs(query))
+    return shape_of(q)
+
+
+def test_shape_of():
+    assert _shape("foo=1&foo=2&$ne-foo=3&$lte-foo=5&q=x&kind=a&sort=foo&limit=5") == (
+        Shape(
+            filter=(
+                ("$text", "$text"),
+                ("foo", "$in"),
+                ("foo", "$lte"),
+                ("foo", "$nin"),
+                ("kind", "$eq"),
+            ),
+            sort=("foo", 1),
+            limit=8,
+        )
+    )
+    assert _shape("foo=1") == _shape("foo=42")
+    assert _shape("limit=10") == _shape("limit=11") == _shape("limit=16")
+    assert _shape("limit=17").limit == 32
+    assert _shape("limit=1").limit == 1
+    assert _shape("") == Shape((), None, None)
+
+
+def test_shape_limit_matching():
+    assert ShapeLimit().matches(_shape(""))
+    assert ShapeLimit(operators=["$nin"]).matches(_shape("$ne-foo=1"))
+    assert not ShapeLimit(operators=["$nin"]).matches(_shape("foo=1"))
+    assert ShapeLimit(fields=["foo"]).matches(_shape("foo=1"))
+    assert ShapeLimit(sorting=[BY_FOO]).matches(_shape("sort=foo"))
+    assert not ShapeLimit(sorting=[BY_FOO]).matches(_shape(""))
+    assert ShapeLimit(unbounded=True).matches(_shape("foo=1"))
+    assert not ShapeLimit(unbounded=True).matches(_shape("foo=1&limit=5"))
+
+
+def test_token_bucket():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, burst=2, clock=lambda: now[0])
+    assert bucket.reserve(0) == 0
+    assert bucket.reserve(0) == 0
+    assert bucket.reserve(0) is None
+    assert bucket.reserve(1) == 0.5
+    now[0] = 1.0
+    assert bucket.reserve(0) == 0
+    bucket.refund()
+    assert bucket.reserve(0) == 0
+    with pytest.raises(ValueError):
+        ShapeLimit(rate=0)
+
+
+def test_concurrency_limit(fake_coll):
+    controller = AdmissionController(
+        [ShapeLimit(max_concurrency=1, operators=["$nin"])], max_wait=0.01
+    )
+    fake_coll.gate.clear()
+    with ThreadPoolExecutor(2) as pool:
+        slow = pool.submit(
+            controller.find, fake_coll, FLTR, SORTING, PG, parse_qs("$ne-foo=1")
+        )
+        deadline = time.monotonic() + 5
+        while not fake_coll.calls:
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+        with pytest.raises(Rejected) as e:
+            controller.find(fake_coll, FLTR, SORTING, PG, parse_qs("$ne-foo=2"))
+        assert e.value.shape == _shape("$ne-foo=2")
+        # other shapes are not limited
+        assert controller._gates_for(_shape("foo=1")) == []
+        fake_coll.gate.set()
+        assert slow.result() == (fake_coll.docs, None)
+    assert controller.find(fake_coll, FLTR, SORTING, PG, parse_qs("$ne-foo=2")) == (
+        fake_coll.docs,
+        None,
+    )
+    assert (controller.stats.admitted, controller.stats.rejected) == (2, 1)
+    assert controller.find(fake_coll, FLTR, SORTING, PG, parse_qs("foo=x"))[1] == (
+        "Error while parsing 'foo' param. invalid literal for int() with base 10: 'x'"
+    )
+
+
+def test_rate_limit(fake_coll):
+    controller = AdmissionController(
+        [ShapeLimit(rate=1, burst=1, max_concurrency=5)], max_wait=0
+    )
+    controller.find(fake_coll, FLTR, SORTING, PG, {})
+    with pytest.raises(Rejected):
+        controller.find(fake_coll, FLTR, SORTING, PG, {})
+    assert repr(controller.stats).startswith(
+        "AdmissionStats({'admitted': 1, 'rejected': 1"
+    )
+
+
+def test_rejection_refunds_rate_budget(fake_coll):
+    controller = AdmissionController(
+        [ShapeLimit(rate=1, burst=2), ShapeLimit(max_concurrency=1)], max_wait=0
+    )
+    fake_coll.gate.clear()
+    with ThreadPoolExecutor(1) as pool:
+        slow = pool.submit(controller.find, fake_coll, FLTR, SORTING, PG, {})
+        deadline = time.monotonic() + 5
+        while not fake_coll.calls:
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+        with pytest.raises(Rejected):
+            controller.find(fake_coll, FLTR, SORTING, PG, {})
+        fake_coll.gate.set()
+        slow.result()
+    # the token of the rejected query was given back
+    assert controller.find(fake_coll, FLTR, SORTING, PG, {})[1] is None
+
+
+def test_shapes_are_bounded(fake_coll):
+    controller = AdmissionController([ShapeLimit(max_concurrency=1)], max_shapes=2)
+    for query in ("foo=1", "$ne-foo=1", "$lte-foo=1", "foo=1"):
+        controller.find(fake_coll, FLTR, SORTING, PG, parse_qs(query))
+    assert len(controller._gates) == 2
+    assert [shape for _, shape in controller._gates] == [
+        _shape("$lte-foo=1"),
+        _shape("foo=1"),
+    ]
+
+
+def test_busy_shapes_are_not_evicted(fake_coll, make_coll):
+    controller = AdmissionController([ShapeLimit(max_concurrency=1)], max_shapes=1)
+    other = make_coll(fake_coll.docs, name="other")
+    fake_coll.gate.clear()
+    with ThreadPoolExecutor(1) as pool:
+        slow = pool.submit(
+            controller.find, fake_coll, FLTR, SORTING, PG, parse_qs("foo=1")
+        )
+        deadline = time.monotonic() + 5
+        while not fake_coll.calls:
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+        try:
+            # another shape exceeds max_shapes, but the running one keeps its gate
+            controller.find(other, FLTR, SORTING, PG, parse_qs("$ne-foo=1"))
+            with pytest.raises(Rejected):
+                controller.find(other, FLTR, SORTING, PG, parse_qs("foo=2"))
+        finally:
+            fake_coll.gate.set()
+        slow.result()
+    controller.find(other, FLTR, SORTING, PG, parse_qs("$ne-foo=1"))
+    assert [shape for _, shape in controller._gates] == [_shape("$ne-foo=1")]
+
+
+def test_admission_async(fake_coll):
+    async def main():
+        controller = AdmissionControllerAsync(
+            [ShapeLimit(max_concurrency=1, operators=["$nin"])], max_wait=0.01
+        )
+        fake_coll.gate.clear()
+        slow = asyncio.ensure_future(
+            controller.find(fake_coll, FLTR, SORTING, PG, parse_qs("$ne-foo=1"))
+        )
+        await asyncio.sleep(0.001)
+        with pytest.raises(Rejected):
+            await controller.find(fake_coll, FLTR, SORTING, PG, parse_qs("$ne-foo=2"))
+        fake_coll.gate.set()
+        assert await slow == (fake_coll.docs, None)
+        assert await controller.find(
+            fake_coll, FLTR, SORTING, PG, parse_qs("$ne-foo=2")
+        ) == (fake_coll.docs, None)
+        assert (controller.stats.admitted, controller.stats.rejected) == (2, 1)
+        assert (await controller.find(fake_coll, FLTR, SORTING, PG, parse_qs("foo=x")))[
+            1
+        ] is not None
+
+        controller = AdmissionControllerAsync([ShapeLimit(rate=1000)], max_wait=1)
+        for _ in range(3):
+            await controller.find(fake_coll, FLTR, SORTING, PG, {})
+        fake_coll.gate.clear()
+        controller = AdmissionControllerAsync([ShapeLimit(max_concurrency=1)])
+        slow = asyncio.ensure_future(controller.find(fake_coll, FLTR, SORTING, PG, {}))
+        await asyncio.sleep(0.001)
+        with pytest.raises(Rejected):
+            await controller.find(fake_coll, FLTR, SORTING, PG, {})
+        fake_coll.gate.set()
+        await slow
+
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+import asyncio
+from urllib.parse import parse_qs
+
+from monquery import (
+    FilterSimple,
+    PaginationBasic,
+    ParamText,
+    Sorting,
+    SortingOption,
+    params_basic,
+    parse_int,
+)
+from monquery.batch import pymongo_find_many, pymongo_find_many_async
+
+FLTR = FilterSimple([*params_basic("foo", parse_int), ParamText("q")])
+SORTING = Sorting([SortingOption("foo"), SortingOption("-foo", "foo", -1)])
+PG = PaginationBasic()
+
+
+def test_find_many(fake_coll, make_coll):
+    other = make_coll([{"foo": 1}], name="other")
+    results = pymongo_find_many(
+        FLTR,
+        SORTING,
+        PG,
+        [
+            (fake_coll, parse_qs("foo=1&sort=-foo&skip=1&limit=2")),
+            (fake_coll, parse_qs("foo=x")),
+            (other, parse_qs("foo=2&limit=5")),
+            (fake_coll, parse_qs("$ne-foo=3&limit=5")),
+            (fake_coll, parse_qs("q=hello&limit=5")),
+            (fake_coll, parse_qs("foo=4")),
+            (fake_coll, parse_qs("limit=5")),
+        ],
+        projection={"_id": False},
+        facet=True,
+    )
+    assert results == [
+        (fake_coll.docs, None),
+        (
+            None,
+            "Error while parsing 'foo' param. invalid literal for int() with base 10: 'x'",
+        ),
+        (other.docs, None),
+        (fake_coll.docs, None),
+        (fake_coll.docs, None),
+        (fake_coll.docs, None),
+        (fake_coll.docs, None),
+    ]
+    assert other.calls == [
+        ("find", {"$and": [{"foo": {"$in": [2]}}]}, {"_id": False}, {})
+    ]
+    aggregate = next(c for c in fake_coll.calls if c[0] == "aggregate")
+    assert aggregate == (
+        "aggregate",
+        [
+            {
+                "$match": {
+                    "$or": [
+                        {"$and": [{"foo": {"$in": [1]}}]},
+                        {"$and": [{"foo": {"$nin": [3]}}]},
+                    ]
+                }
+            },
+            {
+                "$facet": {
+                    "0": [
+                        {"$match": {"$and": [{"foo": {"$in": [1]}}]}},
+                        {"$sort": {"foo": -1}},
+                        {"$skip": 1},
+                        {"$limit": 2},
+                        {"$project": {"_id": False}},
+                    ],
+                    "1": [
+                        {"$match": {"$and": [{"foo": {"$nin": [3]}}]}},
+                        {"$limit": 5},
+                        {"$project": {"_id": False}},
+                    ],
+                }
+            },
+        ],
+        {},
+    )
+    # text search, unlimited and unfiltered queries aren't combined
+    assert [c[0] for c in fake_coll.calls].count("find") == 3
+
+
+def test_find_many_without_facet(fake_coll):
+    results = pymongo_find_many(
+        FLTR,
+        SORTING,
+        PG,
+        [
+            (fake_coll, parse_qs("foo=1&limit=5")),
+            (fake_coll, parse_qs("foo=2&limit=1")),
+        ],
+    )
+    assert results == [(fake_coll.docs, None), (fake_coll.docs[:1], None)]
+    assert [c[0] for c in fake_coll.calls] == ["find", "find"]
+    assert pymongo_find_many(FLTR, SORTING, PG, []) == []
+    assert pymongo_find_many(FLTR, SORTING, PG, [(fake_coll, {})]) == [
+        (fake_coll.docs, None)
+    ]
+
+
+def test_find_many_errors(fake_coll, make_coll):
+    error = RuntimeError("down")
+    broken = make_coll([{"foo": 1}], name="broken", error=error)
+    requests = [
+        (fake_coll, parse_qs("foo=1&limit=5")),
+        (broken, parse_qs("foo=1&limit=5")),
+        (broken, parse_qs("foo=2&limit=5")),
+        (broken, parse_qs("q=hello")),
+    ]
+    expected = [(fake_coll.docs, None), (None, error), (None, error), (None, error)]
+    for facet in (False, True):
+        assert pymongo_find_many(FLTR, SORTING, PG, requests, facet=facet) == expected
+        assert (
+            asyncio.run(
+                pymongo_find_many_async(FLTR, SORTING, PG, requests, facet=facet)
+            )
+            == expected
+        )
+    assert [c[0] for c in broken.calls].count("aggregate") == 2
+
+
+def test_find_many_async(fake_coll, make_coll):
+    other = make_coll([{"foo": 1}], name="other")
+    results = asyncio.run(
+        pymongo_find_many_async(
+            FLTR,
+            SORTING,
+            PG,
+            [
+                (fake_coll, parse_qs("foo=1&limit=1")),
+                (fake_coll, parse_qs("foo=x")),
+                (other, parse_qs("foo=2")),
+                (fake_coll, parse_qs("$ne-foo=3&limit=5")),
+            ],
+            facet=True,
+            max_concurrency=1,
+        )
+    )
+    assert results == [
+        (fake_coll.docs, None),
+        (
+            None,
+            "Error while parsing 'foo' param. invalid literal for int() with base 10: 'x'",
+        ),
+        (other.docs, None),
+        (fake_coll.docs, None),
+    ]
+    assert [c[0] for c in fake_coll.calls] == ["aggregate"]
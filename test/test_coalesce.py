@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from urllib.parse import parse_qs
+
+import pytest
+
+from monquery import FilterSimple, PaginationBasic, Sorting, SortingOption, parse_int
+from monquery import params_basic
+from monquery.coalesce import SingleFlight, SingleFlightAsync
+
+FLTR = FilterSimple(params_basic("foo", parse_int))
+SORTING = Sorting([SortingOption("foo")])
+PG = PaginationBasic()
+
+
+def _wait_for(predicate):
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_single_flight(fake_coll):
+    sf = SingleFlight()
+    fake_coll.gate.clear()
+    with ThreadPoolExecutor(8) as pool:
+        futures = [
+            pool.submit(
+                sf.find, fake_coll, FLTR, SORTING, PG, parse_qs("foo=1&sort=foo")
+            )
+            for _ in range(8)
+        ]
+        _wait_for(lambda: sf.stats.coalesced == 7)
+        fake_coll.gate.set()
+        results = [f.result() for f in futures]
+    assert len(fake_coll.calls) == 1
+    assert all(r == (fake_coll.docs, None) for r in results)
+    assert sf.stats.as_dict() == {
+        "executed": 1,
+        "coalesced": 7,
+        "errors": 0,
+        "timeouts": 0,
+    }
+    assert sf.find(fake_coll, FLTR, SORTING, PG, parse_qs("foo=x")) == (
+        None,
+        "Error while parsing 'foo' param. invalid literal for int() with base 10: 'x'",
+    )
+    sf.find(fake_coll, FLTR, SORTING, PG, parse_qs("foo=1&sort=foo"))
+    assert len(fake_coll.calls) == 2
+
+
+def test_single_flight_error_and_timeout(fake_coll):
+    sf = SingleFlight(timeout=0.01)
+    fake_coll.gate.clear()
+    fake_coll.error = RuntimeError("boom")
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(sf.find, fake_coll, FLTR, SORTING, PG, {})
+        _wait_for(lambda: sf.stats.executed == 1)
+        follower = pool.submit(sf.find, fake_coll, FLTR, SORTING, PG, {})
+        with pytest.raises(FutureTimeoutError):
+            follower.result()
+        fake_coll.gate.set()
+        with pytest.raises(RuntimeError):
+            leader.result()
+    assert sf.stats.errors == 1
+    assert sf.stats.timeouts == 1
+    assert repr(sf.stats) == (
+        "SingleFlightStats({'executed': 1, 'coalesced': 1, 'errors': 1, 'timeouts': 1})"
+    )
+
+
+def test_single_flight_async(fake_coll):
+    async def main():
+        sf = SingleFlightAsync(timeout=5)
+        fake_coll.gate.clear()
+        tasks = [
+            asyncio.ensure_future(
+                sf.find(fake_coll, FLTR, SORTING, PG, parse_qs("sort=foo"))
+            )
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0.01)
+        fake_coll.gate.set()
+        results = await asyncio.gather(*tasks)
+        assert all(r == (fake_coll.docs, None) for r in results)
+        assert len(fake_coll.calls) == 1
+        assert (sf.stats.executed, sf.stats.coalesced) == (1, 4)
+
+        fake_coll.error = RuntimeError("boom")
+        results = await asyncio.gather(
+            sf.find(fake_coll, FLTR, SORTING, PG, {}),
+            sf.find(fake_coll, FLTR, SORTING, PG, {}),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert sf.stats.errors == 1
+
+        fake_coll.error = None
+        fake_coll.gate.clear()
+        sf = SingleFlightAsync(timeout=0.01)
+        leader = asyncio.ensure_future(sf.find(fake_coll, FLTR, SORTING, PG, {}))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await sf.find(fake_coll, FLTR, SORTING, PG, {})
+        assert sf.stats.timeouts == 1
+        fake_coll.gate.set()
+        assert (await leader)[0] == fake_coll.docs
+        assert await sf.find(fake_coll, FLTR, SORTING, PG, parse_qs("foo=x")) == (
+            None,
+            "Error while parsing 'foo' param. invalid literal for int() with base 10: 'x'",
+        )
+
+    asyncio.run(main())
+
+
+def test_query_key(fake_coll):
+    from monquery.query import Query, collection_key, freeze
+
+    assert Query({"a": 1, "b": [1, 2]}).key() == Query({"b": [1, 2], "a": 1}).key()
+    assert Query({"a": 1}).key() != Query({"a": 1}, SortingOption("a")).key()
+    assert freeze({"a": {1, 2}}) == (dict, (("a", ("set", "{1, 2}")),))
+    assert freeze(True) != freeze(1)
+    assert Query({"a": True}).key() != Query({"a": 1}).key()
+    # only top-level fields are unordered
+    assert Query({"a": {"x": 1, "y": 2}}).key() != Query({"a": {"y": 2, "x": 1}}).key()
+    assert Query({}, projection={"a": 1, "b": 1}).key() == (
+        Query({}, projection={"b": 1, "a": 1}).key()
+    )
+    assert collection_key(fake_coll) == id(fake_coll)
+
+
+def test_query_key_ignores_clause_order():
+    from monquery.query import Query
+
+    a, _ = FLTR.from_query(parse_qs("foo=1&$ne-foo=2"))
+    b, _ = FLTR.from_query(parse_qs("$ne-foo=2&foo=1"))
+    assert a != b
+    assert Query(a).key() == Query(b).key()
+    assert Query({"$or": [{"a": 1, "b": 2}, {"c": 3}]}).key() == (
+        Query({"$or": [{"c": 3}, {"b": 2, "a": 1}]}).key()
+    )
+    assert Query({"$or": [{"a": 1}]}).key() != Query({"$and": [{"a": 1}]}).key()
+
+
+def test_collection_key():
+    from bson.codec_options import CodecOptions
+    from pymongo import MongoClient
+    from pymongo.read_preferences import Secondary
+
+    from monquery.query import collection_key
+
+    coll = MongoClient(connect=False)["test"]["things"]
+    assert collection_key(coll) == collection_key(coll.with_options())
+    assert collection_key(coll) != collection_key(
+        coll.with_options(read_preference=Secondary())
+    )
+    assert collection_key(coll) != collection_key(
+        coll.with_options(codec_options=CodecOptions(tz_aware=True))
+    )
@@ -0,0 +1,147 @@
+from urllib.parse import parse_qs
+
+import pytest
+
+from monquery import FilterSimple, ParamText, params_basic, parse_int
+from monquery.count import (
+    CAPPED,
+    ESTIMATED,
+    EXACT,
+    SAMPLED,
+    Count,
+    count,
+    plan_stages,
+    pymongo_count,
+    sampled_count,
+)
+
+FLTR = FilterSimple([*params_basic("foo", parse_int), ParamText("q")])
+
+
+class FakeDatabase:
+    def __init__(self, stage):
+        self.stage = stage
+        self.commands = []
+
+    def command(self, cmd):
+        self.commands.append(cmd)
+        return {
+            "queryPlanner": {
+                "winningPlan": {
+                    "stage": "FETCH",
+                    "inputStage": {"stage": self.stage},
+                }
+            }
+        }
+
+
+class CountingCollection:
+    def __init__(self, total, matching, sampled=None, stage="IXSCAN"):
+        self.name = "things"
+        self.database = FakeDatabase(stage)
+        self.total = total
+        self.matching = matching
+        self.sampled = sampled
+        self.calls = []
+
+    def estimated_document_count(self):
+        self.calls.append("estimated_document_count")
+        return self.total
+
+    def count_documents(self, fltr, limit=0, **kwargs):
+        self.calls.append(("count_documents", fltr, limit))
+        return min(self.matching, limit) if limit else self.matching
+
+    def aggregate(self, pipeline, **kwargs):
+        self.calls.append(("aggregate", pipeline))
+        return iter([] if not self.sampled else [{"n": self.sampled}])
+
+
+def test_count_str():
+    assert str(Count(10000, CAPPED, 10001)) == "10,000+"
+    assert str(Count(1234, EXACT, 1234, 1234)) == "1,234"
+    assert str(Count(1200000, SAMPLED, 1100000, 1300000)) == "about 1,200,000"
+
+
+def test_capped():
+    coll = CountingCollection(10**6, 50000)
+    assert count(coll, {"foo": 1}, cap=100) == Count(100, CAPPED, 101, None)
+    assert coll.calls == [("count_documents", {"foo": 1}, 101)]
+    coll = CountingCollection(10**6, 5)
+    assert count(coll, {"foo": 1}, cap=100) == Count(5, EXACT, 5, 5)
+
+
+def test_sampled():
+    coll = CountingCollection(10**6, 0, sampled=300)
+    c = sampled_count(coll, {"foo": 1}, sample_size=1000)
+    assert (c.value, c.mode) == (300000, SAMPLED)
+    assert 270000 < c.lower < 300000 < c.upper < 330000
+    assert coll.calls[1][1] == [
+        {"$sample": {"size": 1000}},
+        {"$match": {"foo": 1}},
+        {"$count": "n"},
+    ]
+    c = sampled_count(CountingCollection(10**6, 0), {"foo": 1}, sample_size=1000)
+    assert (c.value, c.lower) == (0, 0)
+    assert 0 < c.upper < 5000
+    assert sampled_count(CountingCollection(50, 0, sampled=7), {}) == Count(
+        7, EXACT, 7, 7
+    )
+
+
+def test_auto_mode():
+    coll = CountingCollection(10**6, 0, sampled=300, stage="COLLSCAN")
+    assert plan_stages(coll, {"foo": 1}) == {"FETCH", "COLLSCAN"}
+    assert coll.database.commands == [
+        {
+            "explain": {"find": "things", "filter": {"foo": 1}},
+            "verbosity": "queryPlanner",
+        }
+    ]
+    assert count(coll, {"foo": 1}).mode == SAMPLED
+    # small collections are scanned
+    coll = CountingCollection(500, 20, stage="COLLSCAN")
+    assert count(coll, {"foo": 1}) == Count(20, EXACT, 20, 20)
+    # text search can't be sampled
+    coll = CountingCollection(10**6, 20, stage="COLLSCAN")
+    assert count(coll, {"$text": {"$search": "x"}}).mode == EXACT
+    assert coll.database.commands == []
+    coll = CountingCollection(10**6, 20)
+    assert count(coll, {}) == Count(10**6, ESTIMATED)
+    with pytest.raises(ValueError):
+        count(coll, {}, mode="whatever")
+
+
+def test_auto_mode_rare_matches():
+    # 5000 matches in 10M documents are 0.5 expected matches in the sample
+    coll = CountingCollection(10**7, 5000, sampled=0, stage="COLLSCAN")
+    assert count(coll, {"foo": 1}) == Count(5000, EXACT, 5000, 5000)
+    assert [c if isinstance(c, str) else c[0] for c in coll.calls] == [
+        "estimated_document_count",
+        "aggregate",
+        "count_documents",
+    ]
+    coll = CountingCollection(10**7, 50000, sampled=29, stage="COLLSCAN")
+    assert count(coll, {"foo": 1}) == Count(10000, CAPPED, 10001, None)
+    coll = CountingCollection(10**7, 50000, sampled=29, stage="COLLSCAN")
+    assert count(coll, {"foo": 1}, min_matches=10).mode == SAMPLED
+
+
+def test_forced_modes():
+    coll = CountingCollection(10**6, 20000)
+    assert count(coll, {"foo": 1}, mode=EXACT) == Count(20000, EXACT, 20000, 20000)
+    assert coll.calls == [("count_documents", {"foo": 1}, 0)]
+    assert count(coll, {}, mode=ESTIMATED) == Count(10**6, ESTIMATED)
+    with pytest.raises(ValueError):
+        count(coll, {"foo": 1}, mode=ESTIMATED)
+
+
+def test_pymongo_count():
+    coll = CountingCollection(10**6, 20000)
+    assert pymongo_count(coll, FLTR, parse_qs("foo=1&limit=10")) == (
+        Count(10000, CAPPED, 10001, None),
+        None,
+    )
+    assert pymongo_count(coll, FLTR, parse_qs("foo=x"))[0] is None
+    coll = CountingCollection(10**6, 0, sampled=10)
+    assert pymongo_count(coll, FLTR, parse_qs("foo=1"), mode=SAMPLED)[0].value == 10000
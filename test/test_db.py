@@ -1,18 +1,34 @@
+import asyncio
+import os
 from datetime import datetime
+from types import SimpleNamespace
 from urllib.parse import parse_qs
 
+import bson
 import pytest
+from bson import Regex
+from bson.raw_bson import RawBSONDocument
 
 from monquery import (
     FilterSimple,
+    ParamText,
     parse_datetime_iso,
     parse_int,
     SortingOption,
     Sorting,
     PaginationBasic,
     params_basic,
+    CASE_INSENSITIVE_COLLATION,
 )
-from monquery.db import pymongo_find
+from monquery.db import pymongo_find, ClientRegistry, PoolStats
+from monquery.errors import (
+    ErrorList,
+    INVALID_VALUE,
+    NOT_INTEGER,
+    TEXT_SCORE_WITHOUT_TEXT,
+    UNEXPECTED_SORTING_KEY,
+)
+from monquery.raw import RawFields, raw_to_json, raw_list_to_json
 
 
 @pytest.fixture()
@@ -98,3 +114,287 @@ def test_pymongo(coll, fltr, pagination, sorting, query, expected):
     )
     assert list(cursor) == expected
     assert err is None
+
+
+def test_raw_fields():
+    doc = RawBSONDocument(
+        bson.encode(
+            {
+                "title": "foo",
+                "description": "bar",
+                "nested": {"a": [1, 2, 3]},
+                "pattern": Regex("^x", "i"),
+                "created_at": datetime(2022, 5, 6, 20, 35, 14, 991000),
+                "count": 42,
+            }
+        )
+    )
+    fields = RawFields(doc)
+    assert fields["count"] == 42
+    assert fields.get("missing") is None
+    assert "nested" in fields
+    assert "missing" not in fields
+    assert fields.project(["title", "count", "missing"]) == {
+        "title": "foo",
+        "count": 42,
+    }
+    assert raw_to_json(doc, ["created_at", "title", "missing"]) == (
+        b'{"created_at":"2022-05-06T20:35:14.991000","title":"foo"}'
+    )
+    assert raw_list_to_json([doc, doc.raw], ["count"]) == b'[{"count":42},{"count":42}]'
+    # documents nested in a raw batch are backed by a memoryview
+    view_doc = RawBSONDocument(memoryview(doc.raw))
+    assert RawFields(view_doc)["title"] == "foo"
+    assert raw_to_json(view_doc, ["count"]) == b'{"count":42}'
+
+
+def test_find_raw(fake_coll, fltr, sorting):
+    cursor, err = pymongo_find(
+        fake_coll, fltr, sorting, PaginationBasic(), parse_qs("limit=2"), raw=True
+    )
+    assert err is None
+    docs = list(cursor)
+    assert all(isinstance(d, RawBSONDocument) for d in docs)
+    assert raw_list_to_json(docs, ["bar"]) == (
+        b'[{"bar":"hello there"},{"bar":"general kenobi"}]'
+    )
+    [raw] = fake_coll.clones
+    assert raw.options["codec_options"].document_class is RawBSONDocument
+    assert fake_coll.calls == []
+
+
+def test_find_collect_all(sorting):
+    fltr = FilterSimple(params_basic("foo", parse_int), collect_all=True)
+    query = parse_qs("foo=x&$ne-foo=y&skip=z&sort=nope")
+    cursor, err = pymongo_find(
+        None,
+        fltr,
+        sorting,
+        PaginationBasic(collect_all=True),
+        query,
+        collect_all=True,
+    )
+    assert cursor is None
+    assert isinstance(err, ErrorList)
+    assert [(e.code, e.param, e.value) for e in err] == [
+        (INVALID_VALUE, "foo", "x"),
+        (INVALID_VALUE, "$ne-foo", "y"),
+        (NOT_INTEGER, "skip", "z"),
+        (UNEXPECTED_SORTING_KEY, "sort", "nope"),
+    ]
+    cursor, err = pymongo_find(None, fltr, sorting, PaginationBasic(), query)
+    assert isinstance(err, ErrorList)
+    assert len(err) == 2
+    # pymongo_find controls the mode on its own
+    _, err = pymongo_find(
+        None,
+        FilterSimple(params_basic("foo", parse_int)),
+        sorting,
+        PaginationBasic(),
+        parse_qs("foo=x&$ne-foo=y&skip=z&limit=w"),
+        collect_all=True,
+    )
+    assert [(e.param, e.value) for e in err] == [
+        ("foo", "x"),
+        ("$ne-foo", "y"),
+        ("skip", "z"),
+        ("limit", "w"),
+    ]
+
+
+def test_text_score_requires_text(fake_coll):
+    fltr = FilterSimple([*params_basic("foo", parse_int), ParamText("q")])
+    sorting = Sorting([ParamText.sorting_option()], key="order")
+    _, err = pymongo_find(
+        fake_coll, fltr, sorting, PaginationBasic(), parse_qs("foo=1&order=relevance")
+    )
+    assert (err.code, err.param, err.value) == (
+        TEXT_SCORE_WITHOUT_TEXT,
+        "order",
+        "relevance",
+    )
+    assert err == "sorting by 'relevance' requires a text search"
+    _, err = pymongo_find(
+        fake_coll,
+        fltr,
+        sorting,
+        PaginationBasic(),
+        parse_qs("order=relevance"),
+        collect_all=True,
+    )
+    assert [e.code for e in err] == [TEXT_SCORE_WITHOUT_TEXT]
+    # filter errors aren't followed by a misleading text score one
+    _, err = pymongo_find(
+        fake_coll,
+        fltr,
+        sorting,
+        PaginationBasic(),
+        parse_qs("q=" + "a" * 200 + "&order=relevance"),
+        collect_all=True,
+    )
+    assert [e.param for e in err] == ["q"]
+    cursor, err = pymongo_find(
+        fake_coll, fltr, sorting, PaginationBasic(), parse_qs("q=a&order=relevance")
+    )
+    assert err is None
+    assert fake_coll.calls == [
+        ("find", {"$and": [{"$text": {"$search": "a"}}]}, None, {})
+    ]
+    assert cursor.sort_spec == [("score", {"$meta": "textScore"})]
+
+
+def test_find_collation(fake_coll, sorting):
+    cursor, err = pymongo_find(
+        fake_coll,
+        FilterSimple([]),
+        sorting,
+        PaginationBasic(),
+        parse_qs("sort=-foo&limit=2"),
+        projection={"_id": False},
+        collation=CASE_INSENSITIVE_COLLATION,
+    )
+    assert err is None
+    assert list(cursor) == fake_coll.docs[:2]
+    assert cursor.sort_spec == [("-foo", -1)]
+    assert fake_coll.calls == [
+        ("find", {}, {"_id": False}, {"collation": CASE_INSENSITIVE_COLLATION})
+    ]
+
+
+def test_client_registry():
+    created = []
+
+    class Client(dict):
+        def __init__(self, uri, event_listeners, **options):
+            super().__init__(db={"coll": (uri, options)})
+            self.listeners = event_listeners
+            created.append(self)
+            self.closed = False
+            self.admin = self
+
+        def command(self, name):
+            assert name == "ping"
+
+        def close(self):
+            self.closed = True
+
+    registry = ClientRegistry(client_factory=Client)
+    registry.register("main", "mongodb://main", max_pool_size=10, min_pool_size=2)
+    registry.register(
+        "reports", "mongodb://reports", wait_queue_timeout_ms=100, appname="x"
+    )
+    assert created == []
+    assert registry.collection("main", "db", "coll") == (
+        "mongodb://main",
+        {"maxPoolSize": 10, "minPoolSize": 2},
+    )
+    assert registry.client("main") is created[0]
+    registry.prewarm(["reports"]).join()
+    assert created[1]["db"]["coll"] == (
+        "mongodb://reports",
+        {
+            "maxPoolSize": 100,
+            "minPoolSize": 0,
+            "waitQueueTimeoutMS": 100,
+            "appname": "x",
+        },
+    )
+    [listener] = created[0].listeners
+    listener.connection_checked_out(SimpleNamespace(duration=0.5))
+    assert registry.stats("main").as_dict()["max_wait"] == 0.5
+    parent_client = registry.client("main")
+    registry._after_fork()
+    assert registry.client("main") is not parent_client
+    assert not parent_client.closed
+    registry.close()
+    assert all(c.closed for c in created[2:])
+
+
+def test_client_registry_prewarm_errors():
+    class Client:
+        def __init__(self, uri, event_listeners, **options):
+            self.uri = uri
+            self.admin = self
+            self.pinged = False
+
+        def command(self, name):
+            if self.uri == "mongodb://down":
+                raise ConnectionError("down")
+            self.pinged = True
+
+    registry = ClientRegistry(client_factory=Client)
+    registry.register("main", "mongodb://main")
+    registry.register("down", "mongodb://down")
+    registry.prewarm().join()
+    assert registry.client("main").pinged
+    assert registry.stats("main").as_dict()["prewarm_errors"] == 0
+    stats = registry.stats("down")
+    assert isinstance(stats.last_error, ConnectionError)
+    assert stats.as_dict()["prewarm_errors"] == 1
+    assert stats.as_dict()["last_error"] == "ConnectionError('down')"
+    with pytest.raises(KeyError):
+        registry.prewarm(["missing"])
+
+
+def test_client_registry_prewarm_async():
+    pinged = []
+
+    class AsyncClient:
+        def __init__(self, uri, event_listeners, **options):
+            self.uri = uri
+            self.admin = self
+
+        async def command(self, name):
+            if self.uri == "mongodb://down":
+                raise ConnectionError("down")
+            pinged.append(self.uri)
+
+    registry = ClientRegistry(client_factory=AsyncClient)
+    registry.register("main", "mongodb://main")
+    registry.register("down", "mongodb://down")
+    # the blocking variant can't await the ping and says so
+    registry.prewarm(["main"]).join()
+    assert pinged == []
+    assert isinstance(registry.stats("main").last_error, TypeError)
+    asyncio.run(registry.prewarm_async())
+    assert pinged == ["mongodb://main"]
+    assert registry.stats("main").prewarm_errors == 1
+    assert isinstance(registry.stats("down").last_error, ConnectionError)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_client_registry_forked_child():
+    registry = ClientRegistry(client_factory=lambda uri, **options: object())
+    registry.register("main", "mongodb://main")
+    parent_client = registry.client("main")
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        fresh = registry.client("main") is not parent_client
+        os.write(write, b"1" if fresh else b"0")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read, 1) == b"1"
+    assert registry.client("main") is parent_client
+
+
+def test_pool_stats():
+    registry = ClientRegistry()
+    registry.register("main", "mongodb://localhost:1", connect=False)
+    client = registry.client("main")
+    try:
+        (listener,) = [
+            lst
+            for lst in client.options.event_listeners
+            if hasattr(lst, "connection_check_out_started")
+        ]
+        listener.connection_check_out_started(None)
+        listener.connection_checked_out(None)
+        listener.connection_check_out_failed(SimpleNamespace(duration=0.5))
+        stats = registry.stats("main")
+        assert (stats.checkouts, stats.failures, stats.max_wait) == (1, 1, 0.5)
+        assert 0.25 <= stats.mean_wait() < 0.3
+        assert repr(stats).startswith("PoolStats({'checkouts': 1, 'failures': 1")
+    finally:
+        registry.close()
+    assert PoolStats().mean_wait() == 0.0
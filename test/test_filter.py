@@ -1,4 +1,5 @@
-from datetime import datetime
+import json
+from datetime import datetime, timedelta, timezone
 from urllib.parse import parse_qs
 
 from monquery import (
@@ -17,6 +18,22 @@ from monquery import (
     ParamOf,
     optional,
     parse_bool,
+    parse_datetime_rfc3339,
+    parse_epoch_millis,
+    parse_datetime_utc_timestamp,
+    memoized,
+    ParamPrefix,
+    ParamPrefixCi,
+    ParamText,
+    TEXT_SCORE,
+)
+from monquery.errors import (
+    ErrorList,
+    ParamError,
+    INVALID_VALUE,
+    NOT_INTEGER,
+    TOO_LONG,
+    TOO_SHORT,
 )
 
 
@@ -172,3 +189,200 @@ def test_parse_bool():
     assert parse_bool("foo") == (False, None)
     assert parse_bool("0") == (False, None)
     assert parse_bool("baz") == (False, None)
+
+
+def test_parse_datetime_rfc3339():
+    assert parse_datetime_rfc3339("2022-05-06T20:35:14.991Z") == (
+        datetime(2022, 5, 6, 20, 35, 14, 991000, tzinfo=timezone.utc),
+        None,
+    )
+    assert parse_datetime_rfc3339("2022-05-06t20:35:14.12345678z") == (
+        datetime(2022, 5, 6, 20, 35, 14, 123456, tzinfo=timezone.utc),
+        None,
+    )
+    assert parse_datetime_rfc3339("2022-05-06 23:35:14-03:30") == (
+        datetime(
+            2022, 5, 6, 23, 35, 14, tzinfo=timezone(-timedelta(hours=3, minutes=30))
+        ),
+        None,
+    )
+    assert parse_datetime_rfc3339("2022-05-06T20:35:14") == (
+        datetime(1970, 1, 1, tzinfo=timezone.utc),
+        "Invalid RFC 3339 datetime: '2022-05-06T20:35:14'",
+    )
+    assert parse_datetime_rfc3339("2022-13-06T20:35:14.1Z")[1] is not None
+    assert parse_datetime_rfc3339("2022-13-06T20:35:14Z")[1] is not None
+
+
+def test_parse_epoch_millis():
+    assert parse_epoch_millis("1651869314991") == (
+        datetime(2022, 5, 6, 20, 35, 14, 991000, tzinfo=timezone.utc),
+        None,
+    )
+    assert parse_epoch_millis("-1000") == (
+        datetime(1969, 12, 31, 23, 59, 59, tzinfo=timezone.utc),
+        None,
+    )
+    assert parse_epoch_millis("12.5") == (
+        datetime(1970, 1, 1, tzinfo=timezone.utc),
+        "Invalid epoch milliseconds: '12.5'",
+    )
+    assert parse_epoch_millis("9" * 30)[1] == (
+        f"Epoch milliseconds out of range: {'9' * 30!r}"
+    )
+
+
+def test_parse_datetime_utc_timestamp():
+    assert parse_datetime_utc_timestamp("1651869314.5") == (
+        datetime(2022, 5, 6, 20, 35, 14, 500000),
+        None,
+    )
+    assert parse_datetime_utc_timestamp("1e30") == (
+        datetime(1970, 1, 1),
+        "Timestamp out of range: '1e30'",
+    )
+
+
+def test_memoized():
+    calls = []
+
+    def conv(s):
+        calls.append(s)
+        return parse_int(s)
+
+    parse = memoized(conv, maxsize=2)
+    assert parse("1") == (1, None)
+    assert parse("1") == (1, None)
+    assert parse("x")[1] is not None
+    assert calls == ["1", "x"]
+
+
+def test_structured_errors():
+    _, err = FilterSimple([ParamEq("baz", parse_int)]).from_query(
+        parse_qs("baz=4&baz=x")
+    )
+    assert isinstance(err, ParamError)
+    assert (err.code, err.param, err.value) == (INVALID_VALUE, "baz", "x")
+    assert (
+        err
+        == "Error while parsing 'baz' param. invalid literal for int() with base 10: 'x'"
+    )
+    assert err.as_dict() == {
+        "param": "baz",
+        "value": "x",
+        "code": INVALID_VALUE,
+        "message": str(err),
+    }
+    assert err == ParamError(INVALID_VALUE, "baz", "x", err.detail)
+    assert err != ParamError(INVALID_VALUE, "bar", "x", err.detail)
+    assert err != 42
+    assert hash(err) == hash(str(err))
+    _, err = PaginationBasic().from_query(parse_qs("limit=x"))
+    assert repr(err) == (
+        "ParamError(code='not_integer', param='limit', value='x', detail=None)"
+    )
+    assert err.code == NOT_INTEGER
+    assert str(ParamError("custom", "foo")) == "'foo': custom"
+    assert json.dumps(err.as_dict()) == (
+        '{"param": "limit", "value": "x", "code": "not_integer", '
+        '"message": "value of \'limit\' must be integer"}'
+    )
+    assert not hasattr(err, "__dict__")
+
+
+def test_collect_all():
+    q = parse_qs("baz=x&bar=3&$lt-foo=y&skip=a&limit=b")
+    _, err = FilterSimple(
+        [
+            ParamEq("bar", parse_int),
+            ParamEq("baz", parse_int),
+            ParamMax("$lt-foo", parse_int, target_field="foo"),
+        ],
+        collect_all=True,
+    ).from_query(q)
+    assert isinstance(err, ErrorList)
+    assert [(e.code, e.param, e.value) for e in err] == [
+        (INVALID_VALUE, "baz", "x"),
+        (INVALID_VALUE, "$lt-foo", "y"),
+    ]
+    assert PaginationBasic(collect_all=True).from_query(q) == (
+        Pg(),
+        ErrorList(
+            [
+                ParamError(NOT_INTEGER, "skip", "a"),
+                ParamError(NOT_INTEGER, "limit", "b"),
+            ]
+        ),
+    )
+    assert PaginationBasic().from_query(q) == (Pg(), "value of 'skip' must be integer")
+    assert PaginationBasic(collect_all=True).from_query(parse_qs("limit=b")) == (
+        Pg(),
+        "value of 'limit' must be integer",
+    )
+    assert ErrorList.of(None, "foo", ErrorList(["bar"])) == "foo; bar"
+    assert ErrorList.of(None, None) is None
+    assert ErrorList(["foo", ParamError(NOT_INTEGER, "skip", "a")]).as_dict() == [
+        {"message": "foo"},
+        {
+            "param": "skip",
+            "value": "a",
+            "code": NOT_INTEGER,
+            "message": "value of 'skip' must be integer",
+        },
+    ]
+    errors = ErrorList.of(ParamError(NOT_INTEGER, "skip", "a"), "foo")
+    assert str(errors) == "value of 'skip' must be integer; foo"
+    assert json.dumps(errors.as_dict()) == (
+        '[{"param": "skip", "value": "a", "code": "not_integer", '
+        '"message": "value of \'skip\' must be integer"}, {"message": "foo"}]'
+    )
+    assert len(ErrorList(["foo"])) == 1
+    assert repr(ErrorList(["foo"])) == "ErrorList(['foo'])"
+    assert ErrorList(["foo"]) != 1
+    assert hash(ErrorList(["foo"])) == hash("foo")
+
+
+def test_prefix_and_text_params():
+    f = FilterSimple(
+        [
+            ParamPrefix("name", max_length=8),
+            ParamPrefixCi("title[prefix]", target_field="title"),
+            ParamText("q", max_terms=2, language="en"),
+        ]
+    )
+    assert f.from_query(parse_qs("name=a.b*&title[prefix]=Foo&q=hello world")) == (
+        {
+            "$and": [
+                {"name": {"$regex": "^a\\.b\\*"}},
+                {"title": {"$gte": "Foo", "$lt": "Foo\uffff"}},
+                {"$text": {"$search": "hello world", "$language": "en"}},
+            ]
+        },
+        None,
+    )
+    _, err = f.from_query(parse_qs("name=abcdefghi"))
+    assert (err.code, err.param) == (TOO_LONG, "name")
+    assert (
+        err
+        == "Error while parsing 'name' param. Value must be at most 8 characters long"
+    )
+    _, err = ParamPrefixCi("foo", min_length=2).filter_from(["a"])
+    assert err.code == TOO_SHORT
+    _, err = f.from_query(parse_qs("q=a b c"))
+    assert err == "Error while parsing 'q' param. Value must contain at most 2 terms"
+    assert ParamText("q").filter_from(["a"]) == ({"$text": {"$search": "a"}}, None)
+    assert Sorting([ParamText("q").sorting_option()]).from_query(
+        parse_qs("sort=relevance")
+    ) == (SortingOption("relevance", "score", TEXT_SCORE), None)
+    assert repr(f) == (
+        "FilterSimple([ParamPrefix(name='name', target_field=name, min_length=1, "
+        "max_length=8), ParamText(name='q', min_length=1, max_length=128, "
+        "max_terms=2, language='en'), ParamPrefixCi(name='title[prefix]', "
+        "target_field=title, min_length=1, max_length=64)])"
+    )
+
+
+def test_result_types():
+    assert not hasattr(PaginationBasic(), "__dict__")
+    assert Pg() == (None, None)
+    assert hash(SortingOption("foo")) == hash(SortingOption("foo"))
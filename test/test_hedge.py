@@ -0,0 +1,111 @@
+import asyncio
+import threading
+from urllib.parse import parse_qs
+
+import pytest
+from pymongo.read_preferences import Nearest, Primary, Secondary, SecondaryPreferred
+
+from monquery import FilterSimple, PaginationBasic, Sorting, SortingOption, parse_int
+from monquery import params_basic
+from monquery.hedge import HedgedReader, HedgedReaderAsync, LatencyTracker
+from monquery.query import Query
+
+FLTR = FilterSimple(params_basic("foo", parse_int))
+SORTING = Sorting([SortingOption("foo")])
+PG = PaginationBasic()
+
+
+def test_latency_tracker():
+    tracker = LatencyTracker(percentile=0.9, window=10, min_samples=5, default=1.0)
+    for i in range(4):
+        tracker.record(i / 100)
+    assert tracker.delay() == 1.0
+    for i in range(4, 20):
+        tracker.record(i / 100)
+    assert tracker.delay() == 0.18
+    with pytest.raises(ValueError):
+        LatencyTracker(percentile=0)
+
+
+def test_hedged_reader_fast_primary(fake_coll):
+    reader = HedgedReader(tracker=LatencyTracker(default=5))
+    assert reader.find(fake_coll, FLTR, SORTING, PG, parse_qs("foo=1")) == (
+        fake_coll.docs,
+        None,
+    )
+    assert fake_coll.clones == []
+    assert reader.stats.as_dict() == {"queries": 1, "hedged": 0, "hedge_wins": 0}
+    assert reader.find(fake_coll, FLTR, SORTING, PG, parse_qs("foo=x"))[0] is None
+    reader.close()
+
+
+def test_hedged_reader_slow_primary(fake_coll):
+    reader = HedgedReader(
+        read_preference=Secondary(), tracker=LatencyTracker(default=0.01)
+    )
+    fake_coll.gate.clear()
+    try:
+        assert reader.execute(fake_coll, Query({"foo": 1})) == fake_coll.docs
+    finally:
+        fake_coll.gate.set()
+    [hedge] = fake_coll.clones
+    assert hedge.options == {"read_preference": Secondary()}
+    assert hedge.calls == [("find", {"foo": 1}, None, {})]
+    # the slow query is killed
+    assert [c.closed for c in fake_coll.cursors + hedge.cursors] == [True, False]
+    assert reader.stats.as_dict() == {"queries": 1, "hedged": 1, "hedge_wins": 1}
+    reader.close()
+
+
+def test_hedged_reader_all_failing(fake_coll):
+    reader = HedgedReader(tracker=LatencyTracker(default=0.01))
+    fake_coll.gate.clear()
+    fake_coll.error = RuntimeError("boom")
+    # the failed hedge doesn't win, the primary result is waited for
+    threading.Timer(0.05, fake_coll.gate.set).start()
+    with pytest.raises(RuntimeError):
+        reader.execute(fake_coll, Query({}))
+    assert fake_coll.gate.is_set()
+    assert fake_coll.clones[0].options == {"read_preference": Secondary()}
+    reader.close()
+
+
+def test_hedged_reader_other_member(fake_coll):
+    reader = HedgedReader(tracker=LatencyTracker(default=0.01), max_time_ms=500)
+    fake_coll.read_preference = SecondaryPreferred()
+    fake_coll.gate.clear()
+    try:
+        assert reader.execute(fake_coll, Query({"foo": 1})) == fake_coll.docs
+    finally:
+        fake_coll.gate.set()
+    [hedge] = fake_coll.clones
+    assert hedge.options == {"read_preference": Primary()}
+    # the loser can't be killed before its first batch, the time limit bounds it
+    assert [c.max_time for c in fake_coll.cursors + hedge.cursors] == [500, 500]
+    reader.close()
+    reader = HedgedReader(
+        read_preference=Nearest(), tracker=LatencyTracker(default=0.01)
+    )
+    fake_coll.gate.clear()
+    try:
+        reader.execute(fake_coll, Query({}))
+    finally:
+        fake_coll.gate.set()
+    assert fake_coll.clones[-1].options == {"read_preference": Nearest()}
+    assert fake_coll.cursors[-1].max_time is None
+    reader.close()
+
+
+def test_hedged_reader_async(fake_coll):
+    reader = HedgedReaderAsync(tracker=LatencyTracker(default=0.01), max_time_ms=100)
+    fake_coll.gate.clear()
+
+    async def run():
+        return await reader.find(fake_coll, FLTR, SORTING, PG, parse_qs("foo=1"))
+
+    assert asyncio.run(run()) == (fake_coll.docs, None)
+    fake_coll.gate.set()
+    assert fake_coll.cursors[0].closed
+    assert fake_coll.clones[0].options == {"read_preference": Secondary()}
+    assert fake_coll.clones[0].cursors[0].max_time == 100
+    assert reader.stats.as_dict() == {"queries": 1, "hedged": 1, "hedge_wins": 1}
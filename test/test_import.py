@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+import monquery
+
+
+def _loaded_after(statement: str) -> set:
+    out = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys; {statement}; print(' '.join(sorted(sys.modules)))",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return set(out.split())
+
+
+def test_import_is_lazy():
+    loaded = _loaded_after("import monquery")
+    assert "monquery" in loaded
+    assert not {"monquery.fltr", "monquery.paginate", "monquery.sort"} & loaded
+
+
+def test_fltr_imports_json_on_use():
+    assert "json" not in _loaded_after("import monquery.fltr")
+    assert "json" in _loaded_after(
+        "from monquery.fltr import ParamArray; "
+        "ParamArray('a', 'a', lambda s: (s, None), '$in').filter_from(['[1]'])"
+    )
+
+
+def test_db_does_not_import_driver():
+    loaded = _loaded_after("import monquery.db")
+    assert not {"pymongo", "bson", "monquery.fltr"} & loaded
+
+
+def test_lazy_names():
+    assert set(monquery.__all__) <= set(dir(monquery))
+    for name in monquery.__all__:
+        assert getattr(monquery, name) is not None
+    assert monquery.FilterSimple.__module__ == "monquery.fltr"
+    try:
+        monquery.nope
+    except AttributeError as e:
+        assert e.args[0] == "module 'monquery' has no attribute 'nope'"
+    else:  # pragma: no cover
+        raise AssertionError
@@ -0,0 +1,115 @@
+import asyncio
+import time
+from urllib.parse import parse_qs
+
+from monquery import FilterSimple, PaginationBasic, Sorting, SortingOption, parse_int
+from monquery import params_basic
+from monquery.paginate import Pg
+from monquery.prefetch import Prefetcher, PrefetcherAsync, next_page
+from monquery.query import Query
+
+FLTR = FilterSimple(params_basic("foo", parse_int))
+SORTING = Sorting([SortingOption("foo")])
+PG = PaginationBasic()
+DOCS = [{"foo": i} for i in range(5)]
+
+
+def _wait_for(predicate):
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_next_page():
+    assert next_page(Query({}, pg=Pg(limit=10))) == Query({}, pg=Pg(skip=10, limit=10))
+    assert next_page(Query({}, pg=Pg(skip=5, limit=10))).pg == Pg(skip=15, limit=10)
+    assert next_page(Query({})) is None
+
+
+def test_prefetcher(make_coll):
+    coll = make_coll(DOCS)
+    prefetcher = Prefetcher()
+    assert prefetcher.find(coll, FLTR, SORTING, PG, parse_qs("limit=2")) == (
+        DOCS[:2],
+        None,
+    )
+    assert len(coll.calls) == 2
+    assert prefetcher.find(coll, FLTR, SORTING, PG, parse_qs("skip=2&limit=2")) == (
+        DOCS[2:4],
+        None,
+    )
+    # the last page is short, there's nothing to prefetch after it
+    docs, _ = prefetcher.find(coll, FLTR, SORTING, PG, parse_qs("skip=4&limit=2"))
+    assert docs == DOCS[4:]
+    assert len(coll.calls) == 3
+    assert prefetcher.stats.as_dict() == {
+        "hits": 2,
+        "misses": 1,
+        "prefetched": 2,
+        "skipped": 0,
+        "errors": 0,
+        "hit_rate": 2 / 3,
+    }
+    # pages are served once
+    prefetcher.find(coll, FLTR, SORTING, PG, parse_qs("skip=4&limit=2"))
+    assert prefetcher.stats.misses == 2
+
+
+def test_prefetcher_concurrency_cap_and_errors(make_coll):
+    coll = make_coll(DOCS)
+    prefetcher = Prefetcher(max_concurrency=1)
+    coll.gate.clear()
+    q = Query({}, pg=Pg(limit=2))
+    assert prefetcher.prefetch(coll, q)
+    assert not prefetcher.prefetch(coll, Query({"foo": 1}, pg=Pg(limit=2)))
+    assert not prefetcher.prefetch(coll, q)
+    assert prefetcher.stats.skipped == 1
+    coll.error = RuntimeError("boom")
+    coll.gate.set()
+    _wait_for(lambda: prefetcher.stats.errors == 1)
+    coll.error = None
+    # a failed prefetch falls back to running the query
+    assert prefetcher.execute(coll, q._replace(pg=Pg(skip=2, limit=2))) == DOCS[2:4]
+    assert prefetcher.stats.misses == 1
+
+
+def test_prefetcher_ttl_and_size(make_coll):
+    coll = make_coll(DOCS)
+    now = [0.0]
+    prefetcher = Prefetcher(max_entries=2, ttl=10, clock=lambda: now[0])
+    for i in range(3):
+        prefetcher.prefetch(coll, Query({"foo": i}, pg=Pg(limit=1)))
+    assert len(prefetcher) == 2
+    now[0] = 11
+    prefetcher.execute(coll, Query({"foo": 2}, pg=Pg(skip=1, limit=1)))
+    assert prefetcher.stats.hits == 0
+
+
+def test_prefetcher_async(make_coll):
+    coll = make_coll(DOCS)
+    prefetcher = PrefetcherAsync(max_concurrency=1)
+
+    async def browse():
+        pages = []
+        for skip in (0, 2, 4):
+            pages.append(
+                await prefetcher.find(
+                    coll, FLTR, SORTING, PG, parse_qs(f"skip={skip}&limit=2")
+                )
+            )
+        return pages
+
+    assert asyncio.run(browse()) == [
+        (DOCS[:2], None),
+        (DOCS[2:4], None),
+        (DOCS[4:], None),
+    ]
+    assert prefetcher.stats.as_dict() == {
+        "hits": 2,
+        "misses": 1,
+        "prefetched": 2,
+        "skipped": 0,
+        "errors": 0,
+        "hit_rate": 2 / 3,
+    }
@@ -0,0 +1,124 @@
+import pytest
+
+from monquery import (
+    FilterSimple,
+    ParamEq,
+    ParamText,
+    optional,
+    params_basic,
+    parse_epoch_millis,
+    parse_float,
+    parse_int,
+    parse_string,
+)
+from monquery.schema import (
+    Mismatch,
+    check_filter,
+    check_params,
+    converter_for,
+    converter_types,
+    params_for_schema,
+    stored_types,
+)
+
+
+class FakeDatabase:
+    def __init__(self, collections):
+        self.collections = collections
+
+    def list_collections(self, filter):
+        return [c for c in self.collections if c["name"] == filter["name"]]
+
+
+class FakeCollection:
+    def __init__(self, sampled, validator=None):
+        self.name = "things"
+        self.database = FakeDatabase(
+            [
+                {
+                    "name": "things",
+                    "options": {"validator": {"$jsonSchema": validator}}
+                    if validator
+                    else {},
+                }
+            ]
+        )
+        self.sampled = sampled
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return iter(self.sampled)
+
+
+def test_converter_types():
+    assert converter_types(parse_string) == {"string"}
+    assert converter_types(optional(parse_epoch_millis, "null")) == {"date"}
+    assert "long" in converter_types(parse_int)
+    assert converter_types(lambda s: (s, None)) is None
+
+
+def test_stored_types_merges_validator_and_sample():
+    coll = FakeCollection(
+        [{"f0": "int"}, {"f0": "missing"}, {"f0": "long"}],
+        validator={
+            "properties": {
+                "name": {"bsonType": ["string", "null"]},
+                "meta": {"properties": {"created": {"bsonType": "date"}}},
+            }
+        },
+    )
+    types = stored_types(coll, ["name", "meta.created", "count", "absent"])
+    assert types == {
+        "name": {"string"},
+        "meta.created": {"date"},
+        "count": {"int", "long"},
+    }
+    [[sample, project]] = coll.pipelines
+    assert sample == {"$sample": {"size": 100}}
+    assert project == {
+        "$project": {
+            "_id": False,
+            "f0": {"$type": "$count"},
+            "f1": {"$type": "$absent"},
+        }
+    }
+
+
+def test_check_filter():
+    coll = FakeCollection([{"f0": "long", "f1": "int"}, {"f0": "string", "f1": "int"}])
+    fltr = FilterSimple(
+        [
+            *params_basic("foo", parse_string),
+            ParamEq("bar", optional(parse_int, "null"), target_field="baz"),
+            ParamText("q"),
+        ]
+    )
+    mismatches = check_filter(coll, fltr)
+    assert mismatches == [
+        Mismatch("foo", "foo", {"string"}, {"int"}),
+        Mismatch("$ne-foo", "foo", {"string"}, {"int"}),
+    ]
+    assert str(mismatches[0]) == (
+        "Param 'foo' compares field 'foo' with string values, but it holds int"
+    )
+
+
+def test_check_params_skips_unknown():
+    params = [ParamEq("foo", lambda s: (s, None)), ParamEq("bar", parse_int)]
+    assert check_params(params, {"foo": {"int"}}) == []
+
+
+def test_params_for_schema():
+    types = {"foo": {"int", "double"}, "bar": {"string", "null"}, "baz": {"objectId"}}
+    [eq, ne] = params_for_schema(types, "foo")
+    assert eq.binding() == ("foo", parse_float)
+    assert ne.name() == "$ne-foo"
+    [eq, *_] = params_for_schema(types, "b", field="bar", include_range_filters=True)
+    assert eq.binding() == ("bar", parse_string)
+    with pytest.raises(ValueError):
+        params_for_schema(types, "baz")
+    with pytest.raises(ValueError):
+        params_for_schema(types, "missing")
+    with pytest.raises(ValueError):
+        converter_for({"string", "int"})